@@ -1,7 +1,10 @@
 from django.contrib import admin
 
+from .fulltext import update_search_index
 from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingCartItem, Tag, recipe_amounts)
+from .search import recipe_ingredients_changed
+from .similarity import update_signatures
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -18,15 +21,31 @@ class TabularInlineIngredient(admin.TabularInline):
 
 
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("name", "author", "favorited")
+    list_display = ("name", "author", "favorites_count", "in_carts_count")
     list_filter = ("author", "name", "tags")
     exclude = ("ingredients",)
+    readonly_fields = ("favorites_count", "in_carts_count")
     inlines = [TabularInlineIngredient]
 
-    def favorited(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
-
-    favorited.short_description = "В избранном"
+    def save_related(self, request, form, formsets, change):
+        # Инлайн пишет IngredientInRecipe напрямую: списки покупок и
+        # индексы пересчитываются здесь, как в RecordRecipeSerializer.
+        recipe = form.instance
+        old_amounts = recipe_amounts([recipe.pk])
+        super().save_related(request, form, formsets, change)
+        new_amounts = recipe_amounts([recipe.pk])
+        if old_amounts != new_amounts:
+            ShoppingCartItem.objects.change_recipe(
+                list(
+                    recipe.recipe_shopping_cart.values_list("user", flat=True)
+                ),
+                old_amounts,
+                new_amounts,
+            )
+        if old_amounts.keys() != new_amounts.keys():
+            recipe_ingredients_changed([recipe.pk])
+        update_search_index([recipe.pk])
+        update_signatures([recipe.pk])
 
 
 class FavoriteAdmin(admin.ModelAdmin):
@@ -0,0 +1,17 @@
+from django.db import connections, router
+
+
+def bulk_create(model, objects, batch_size=1000):
+    """bulk_create пачками не больше batch_size и лимита бэкенда.
+
+    Django 2.2 не ограничивает явный batch_size лимитом бэкенда, а SQLite
+    не принимает больше 999 параметров в одном запросе.
+    """
+    objects = list(objects)
+    connection = connections[router.db_for_write(model)]
+    limit = connection.ops.bulk_batch_size(
+        model._meta.concrete_fields, objects
+    )
+    return model.objects.bulk_create(
+        objects, batch_size=min(batch_size, max(limit, 1))
+    )
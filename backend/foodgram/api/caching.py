@@ -0,0 +1,91 @@
+import hashlib
+import time
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from .models import Tag
+from foodgram.caches import cache_is_shared
+
+
+def version_key(model):
+    return f"catalogue:version:{model._meta.label_lower}"
+
+
+def bump_catalogue_version(model):
+    version = (uuid.uuid4().hex, int(time.time()))
+    cache.set(version_key(model), version, None)
+    return version
+
+
+def catalogue_version(model):
+    return cache.get(version_key(model)) or bump_catalogue_version(model)
+
+
+def tag_ids_by_slug():
+    if not cache_is_shared():
+        return dict(Tag.objects.values_list("slug", "id"))
+    token, _ = catalogue_version(Tag)
+    key = f"catalogue:tags:{token}"
+    tags = cache.get(key)
+    if tags is None:
+        tags = dict(Tag.objects.values_list("slug", "id"))
+        cache.set(key, tags, settings.CATALOGUE_CACHE_TIMEOUT)
+    return tags
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_ids_by_slug()]
+
+
+class CachedCatalogueMixin:
+    """Кэширует готовый JSON справочника и отвечает 304 на условные запросы.
+
+    Ключ кэша включает версию модели, которую сбрасывают сигналы
+    сохранения и удаления, поэтому устаревшие ответы просто перестают
+    запрашиваться и вытесняются по таймауту. На кэше одного процесса
+    ответ не кэшируется, см. foodgram.caches.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    def cached_response(self, request, build):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, JSONRenderer) or not cache_is_shared():
+            return build()
+        token, modified = catalogue_version(self.queryset.model)
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f"catalogue:response:{token}:{path}"
+        entry = cache.get(key)
+        if entry is None:
+            body = renderer.render(
+                build().data,
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+            entry = (f'"{hashlib.md5(body).hexdigest()}"', body)
+            cache.set(key, entry, settings.CATALOGUE_CACHE_TIMEOUT)
+        etag, body = entry
+        response = get_conditional_response(
+            request, etag=etag, last_modified=modified
+        )
+        if response is None:
+            response = HttpResponse(body, content_type=renderer.media_type)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(modified)
+        patch_vary_headers(response, ("Accept",))
+        return response
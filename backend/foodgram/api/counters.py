@@ -0,0 +1,50 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+RECIPE_COUNTERS = {
+    Favorite: "favorites_count",
+    ShoppingCart: "in_carts_count",
+}
+
+# (модель со счётчиком, поле счётчика, модель строк, ссылка на владельца)
+COUNTERS = (
+    (Recipe, "favorites_count", Favorite, "recipe"),
+    (Recipe, "in_carts_count", ShoppingCart, "recipe"),
+    (User, "recipes_count", Recipe, "author"),
+    (User, "followers_count", Subscription, "author"),
+)
+
+
+def change_counter(queryset, field, delta):
+    """Атомарно сдвигает счётчик, не опуская его ниже нуля."""
+    if not delta:
+        return
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def delete_rows(queryset):
+    """Удаляет строки и возвращает, сколько строк самой модели удалено.
+
+    Счётчик сдвигается на это число, а не на число строк, прочитанных до
+    удаления: параллельный запрос мог удалить их раньше.
+    """
+    _, deleted = queryset.delete()
+    return deleted.get(queryset.model._meta.label, 0)
+
+
+def actual_count(model, link):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{link: OuterRef("pk")})
+            .order_by()
+            .values(link)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
@@ -0,0 +1,39 @@
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from .images import variant_name
+
+
+def image_url(name, has_variants, variant=None, request=None):
+    if not name:
+        return None
+    if variant and has_variants:
+        url = default_storage.url(variant_name(name, variant))
+    else:
+        url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class RecipeImageField(serializers.Field):
+    """Ссылка на изображение рецепта в нужном размере.
+
+    Вариант берётся из аргумента поля или из контекста сериализатора
+    ("image_variant"); пока фоновая обработка не закончена, отдаётся
+    оригинал.
+    """
+
+    def __init__(self, variant=None, **kwargs):
+        kwargs["read_only"] = True
+        kwargs["source"] = "*"
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return image_url(
+            recipe.image.name,
+            recipe.has_image_variants,
+            self.variant or self.context.get("image_variant"),
+            self.context.get("request"),
+        )
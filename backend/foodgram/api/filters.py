@@ -1,5 +1,8 @@
+from django.db.models import Count
 from django_filters import rest_framework as filters
 
+from .caching import tag_choices, tag_ids_by_slug
+from .fulltext import search_recipes
 from .models import Ingredient, Recipe
 
 
@@ -11,13 +14,48 @@ class IngredientFilter(filters.FilterSet):
         fields = ("name",)
 
 
+RECIPE_ORDERINGS = {
+    "popular": ("-popularity", "-pk"),
+    "trending": ("-trending", "-pk"),
+}
+
+
 class RecipeFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name="tags__slug")
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices, method="get_tags"
+    )
+    search = filters.CharFilter(method="get_search")
+    tags_mode = filters.ChoiceFilter(
+        choices=(("any", "any"), ("all", "all")), method="skip"
+    )
+    ordering = filters.ChoiceFilter(
+        choices=[(name, name) for name in RECIPE_ORDERINGS],
+        method="get_ordering",
+    )
     is_favorited = filters.BooleanFilter(method="get_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(
         method="get_is_in_shopping_cart"
     )
 
+    def skip(self, queryset, name, value):
+        return queryset
+
+    def get_tags(self, queryset, name, value):
+        """Рецепты с любым (tags_mode=any) или всеми (all) тегами.
+
+        Фильтр по подзапросу к таблице связей не размножает строки,
+        поэтому DISTINCT по всему рецепту не нужен.
+        """
+        tag_ids = {tag_ids_by_slug()[slug] for slug in value}
+        recipe_tags = Recipe.tags.through.objects.filter(tag_id__in=tag_ids)
+        if self.form.cleaned_data.get("tags_mode") == "all":
+            recipe_tags = (
+                recipe_tags.values("recipe_id")
+                .annotate(matched=Count("tag_id"))
+                .filter(matched=len(tag_ids))
+            )
+        return queryset.filter(pk__in=recipe_tags.values("recipe_id"))
+
     def get_is_favorited(self, queryset, value, name):
         if value and not self.request.user.is_anonymous:
             return queryset.filter(recipe_favorite__user=self.request.user)
@@ -30,6 +68,12 @@ class RecipeFilter(filters.FilterSet):
             )
         return queryset
 
+    def get_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
+
     class Meta:
         model = Recipe
         fields = ("author", "tags")
@@ -0,0 +1,168 @@
+"""Полнотекстовый поиск рецептов по названию, описанию и ингредиентам.
+
+В PostgreSQL документ хранится в Recipe.search_vector (tsvector с русской
+морфологией, GIN-индекс), в SQLite — во внешней таблице FTS5
+api_recipe_fts. Документы обновляются при записи рецепта и удаляются вместе
+с ним; после массовых изменений их пересобирает команда
+rebuild_search_index.
+"""
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import (BooleanField, F, FloatField, OuterRef, Subquery,
+                              Value)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+from .models import IngredientInRecipe, Recipe
+
+SEARCH_CONFIG = "russian"
+FTS_TABLE = "api_recipe_fts"
+# Веса полей: название важнее описания, описание — ингредиентов.
+FTS_WEIGHTS = (10.0, 4.0, 2.0)
+WORD = re.compile(r"\w+")
+
+
+def postgresql_index(recipe_ids):
+    from django.contrib.postgres.aggregates import StringAgg
+
+    names = (
+        IngredientInRecipe.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(names=StringAgg("ingredient__name", " "))
+        .values("names")
+    )
+    recipes = Recipe.objects.all()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    recipes.update(
+        search_vector=SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(
+            Coalesce(Subquery(names), Value("")),
+            weight="C",
+            config=SEARCH_CONFIG,
+        )
+    )
+
+
+def postgresql_search(queryset, text):
+    query = SearchQuery(text, config=SEARCH_CONFIG)
+    return (
+        queryset.filter(search_vector=query)
+        # ts_rank возвращает real: значение из курсора страницы не совпало
+        # бы с ним при сравнении, поэтому ранг приводится к double.
+        .annotate(
+            search_rank=Cast(
+                SearchRank(F("search_vector"), query), FloatField()
+            )
+        )
+        .order_by("-search_rank", "-pk")
+    )
+
+
+def sqlite_documents(recipe_ids):
+    recipes = Recipe.objects.order_by()
+    rows = IngredientInRecipe.objects.order_by()
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+        rows = rows.filter(recipe__in=recipe_ids)
+    names = {}
+    for recipe_id, name in rows.values_list(
+        "recipe_id", "ingredient__name"
+    ).iterator():
+        names.setdefault(recipe_id, []).append(name)
+    for recipe_id, name, text in recipes.values_list(
+        "pk", "name", "text"
+    ).iterator():
+        yield recipe_id, name, text, " ".join(names.get(recipe_id, ()))
+
+
+def create_sqlite_table(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING "
+        "fts5(name, text, ingredients, "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def sqlite_index(recipe_ids):
+    with connection.cursor() as cursor:
+        create_sqlite_table(cursor)
+        if recipe_ids is None:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        else:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(recipe_id,) for recipe_id in recipe_ids],
+            )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, text, ingredients) "
+            "VALUES (%s, %s, %s, %s)",
+            list(sqlite_documents(recipe_ids)),
+        )
+
+
+def no_results(queryset):
+    return queryset.none().annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
+
+
+def sqlite_search(queryset, text):
+    words = WORD.findall(text.lower())
+    if not words:
+        return no_results(queryset)
+    # Без русской морфологии в FTS5 ищем по префиксам слов.
+    match = " ".join(f'"{word}"*' for word in words)
+    # Совпадения и ранг считаются в том же SQL, что и страница: подсчёт и
+    # курсор видят все найденные рецепты, а не первые N из FTS.
+    table = connection.ops.quote_name(Recipe._meta.db_table)
+    rank = RawSQL(
+        f"SELECT -bm25({FTS_TABLE}, %s, %s, %s) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+        (*FTS_WEIGHTS, match),
+        output_field=FloatField(),
+    )
+    # pk__in=RawSQL(...) дал бы IN ((SELECT ...)): для SQLite это список из
+    # одного значения, а не подзапрос.
+    found = RawSQL(
+        f"{table}.id IN (SELECT rowid FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s)",
+        (match,),
+        output_field=BooleanField(),
+    )
+    return (
+        queryset.annotate(search_match=found, search_rank=rank)
+        .filter(search_match=True)
+        .order_by("-search_rank", "-pk")
+    )
+
+
+def update_search_index(recipe_ids=None):
+    """Пересобирает документы рецептов recipe_ids (или всех)."""
+    if connection.vendor == "postgresql":
+        postgresql_index(recipe_ids)
+    else:
+        sqlite_index(recipe_ids)
+
+
+def remove_from_search_index(recipe_ids):
+    """Удаляет документы рецептов из FTS5; в PostgreSQL они в самой строке."""
+    if connection.vendor == "postgresql":
+        return
+    with connection.cursor() as cursor:
+        create_sqlite_table(cursor)
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [(recipe_id,) for recipe_id in recipe_ids],
+        )
+
+
+def search_recipes(queryset, text):
+    if connection.vendor == "postgresql":
+        return postgresql_search(queryset, text)
+    return sqlite_search(queryset, text)
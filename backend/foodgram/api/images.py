@@ -0,0 +1,72 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    "thumbnail": (320, 320),
+    "medium": (800, 800),
+}
+
+
+def variant_name(name, variant):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", f"{stem}_{variant}.webp")
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.IMAGE_WORKERS,
+        thread_name_prefix="recipe-images",
+    )
+
+
+def render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail(size)
+    buffer = BytesIO()
+    variant.save(buffer, format="WEBP", quality=80)
+    return buffer.getvalue()
+
+
+def build_variants(recipe_id, name):
+    try:
+        with default_storage.open(name) as source:
+            image = Image.open(source)
+            image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        for variant, size in VARIANTS.items():
+            path = variant_name(name, variant)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            default_storage.save(
+                path, ContentFile(render_variant(image, size))
+            )
+        Recipe.objects.filter(pk=recipe_id, image=name).update(
+            has_image_variants=True
+        )
+    except Exception:
+        logger.exception("Не удалось обработать изображение %s", name)
+    finally:
+        connection.close()
+
+
+def schedule_variants(recipe):
+    recipe_id, name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: get_executor().submit(build_variants, recipe_id, name)
+    )
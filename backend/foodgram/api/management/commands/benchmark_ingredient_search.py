@@ -0,0 +1,57 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import Ingredient
+from api.search import ingredient_index
+from api.serializers import IngredientSerializer
+
+
+class Command(BaseCommand):
+    help = "Сравнивает поиск ингредиентов через ORM и через индекс в памяти"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def make_queries(self, count, seed):
+        names = list(
+            Ingredient.objects.exclude(name=None).values_list(
+                "name", flat=True
+            )
+        )
+        rng = random.Random(seed)
+        queries = []
+        for _ in range(count):
+            name = rng.choice(names)
+            length = rng.randint(1, min(len(name), 6))
+            start = rng.choice((0, rng.randint(0, len(name) - length)))
+            queries.append(name[start:start + length])
+        return queries
+
+    def measure(self, search, queries):
+        started = time.perf_counter()
+        for query in queries:
+            search(query)
+        return (time.perf_counter() - started) / len(queries) * 1000
+
+    def handle(self, *args, **options):
+        queries = self.make_queries(options["queries"], options["seed"])
+        if not queries:
+            self.stderr.write("Нет ингредиентов для замера")
+            return
+        orm = self.measure(
+            lambda query: IngredientSerializer(
+                Ingredient.objects.filter(name__icontains=query), many=True
+            ).data,
+            queries,
+        )
+        started = time.perf_counter()
+        ingredient_index.build()
+        build = (time.perf_counter() - started) * 1000
+        index = self.measure(ingredient_index.search, queries)
+        self.stdout.write(f"Запросов: {len(queries)}")
+        self.stdout.write(f"ORM icontains: {orm:.3f} мс/запрос")
+        self.stdout.write(f"Индекс в памяти: {index:.3f} мс/запрос")
+        self.stdout.write(f"Построение индекса: {build:.1f} мс")
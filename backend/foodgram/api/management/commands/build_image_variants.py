@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api.images import build_variants, get_executor
+from api.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Строит уменьшенные копии изображений рецептов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересобрать варианты и для уже обработанных рецептов",
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image="")
+        if not options["all"]:
+            recipes = recipes.filter(has_image_variants=False)
+        jobs = [
+            get_executor().submit(build_variants, recipe_id, name)
+            for recipe_id, name in recipes.values_list("pk", "image")
+        ]
+        for job in jobs:
+            job.result()
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработано изображений: {len(jobs)}")
+        )
@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.caching import bump_catalogue_version
+from api.models import Ingredient
+from api.search import ingredient_index
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file, chunk_size=1 << 16):
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = file.read(chunk_size), 0
+            eof = not buffer
+            continue
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item["name"], item["measurement_unit"]
+
+
+READERS = {"csv": read_csv, "json": read_json}
+
+
+class Command(BaseCommand):
+    help = "Загружает ингредиенты из CSV или JSON пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к ingredients.csv или .json")
+        parser.add_argument("--format", choices=READERS, default=None)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Не использовать COPY даже на PostgreSQL",
+        )
+
+    def unique_rows(self, rows):
+        seen = set()
+        for name, measurement_unit in rows:
+            name = name.strip()
+            if name and name not in seen:
+                seen.add(name)
+                yield name, measurement_unit.strip()
+
+    def batches(self, rows, size):
+        rows = iter(rows)
+        batch = list(islice(rows, size))
+        while batch:
+            yield batch
+            batch = list(islice(rows, size))
+
+    def load_bulk(self, rows, batch_size):
+        for batch in self.batches(rows, batch_size):
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in batch
+                ],
+                ignore_conflicts=True,
+            )
+            yield len(batch)
+
+    def load_copy(self, rows, batch_size):
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE ingredient_import "
+                "(name varchar(199), measurement_unit varchar(50)) "
+                "ON COMMIT DROP"
+            )
+            for batch in self.batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.cursor.copy_expert(
+                    "COPY ingredient_import FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                yield len(batch)
+            cursor.execute(
+                f"INSERT INTO {table} (name, measurement_unit) "
+                "SELECT name, measurement_unit FROM ingredient_import "
+                "ON CONFLICT (name) DO NOTHING"
+            )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден")
+        file_format = options["format"] or os.path.splitext(path)[1][1:]
+        if file_format not in READERS:
+            raise CommandError(f"Неизвестный формат файла: {file_format}")
+        use_copy = (
+            connection.vendor == "postgresql" and not options["no_copy"]
+        )
+        load = self.load_copy if use_copy else self.load_bulk
+        before = Ingredient.objects.count()
+        started = time.perf_counter()
+        processed = 0
+        with open(path, encoding="utf-8") as file, transaction.atomic():
+            rows = self.unique_rows(READERS[file_format](file))
+            for count in load(rows, options["batch_size"]):
+                processed += count
+        elapsed = time.perf_counter() - started
+        ingredient_index.invalidate()
+        bump_catalogue_version(Ingredient)
+        created = Ingredient.objects.count() - before
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обработано строк: {processed}, добавлено: {created}, "
+                f"{processed / elapsed if elapsed else 0:.0f} строк/с"
+            )
+        )
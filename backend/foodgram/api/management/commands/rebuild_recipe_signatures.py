@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Recipe
+from api.similarity import recipe_features, signatures, store_signatures
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает MinHash-подписи и LSH-корзины всех рецептов "
+        "пачками; подписи считаются в пуле процессов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Число процессов; 0 — считать в текущем процессе",
+        )
+
+    def batches(self, batch_size):
+        recipe_ids = list(
+            Recipe.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        for start in range(0, len(recipe_ids), batch_size):
+            yield recipe_features(recipe_ids[start:start + batch_size])
+
+    def store(self, computed):
+        with transaction.atomic():
+            store_signatures(computed)
+        return len(computed)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batches = self.batches(options["batch_size"])
+        total = 0
+        if options["workers"] == 0:
+            for features in batches:
+                total += self.store(signatures(features))
+        else:
+            workers = options["workers"]
+            with ProcessPoolExecutor(workers) as pool:
+                pending = []
+                for features in batches:
+                    # Считаем не больше двух пачек на процесс наперёд.
+                    pending.append(pool.submit(signatures, features))
+                    if len(pending) >= workers * 2:
+                        total += self.store(pending.pop(0).result())
+                for future in pending:
+                    total += self.store(future.result())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Подписи пересчитаны для {total} рецептов за "
+                f"{time.perf_counter() - started:.2f} с"
+            )
+        )
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.fulltext import update_search_index
+
+
+class Command(BaseCommand):
+    help = "Пересобирает поисковые документы всех рецептов"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        update_search_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Поисковый индекс пересобран за "
+                f"{time.perf_counter() - started:.2f} с"
+            )
+        )
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from api.bulk import bulk_create
+from api.models import IngredientInRecipe, ShoppingCartItem
+
+
+class Command(BaseCommand):
+    help = "Пересобирает или сверяет агрегаты списка покупок с корзинами"
+    batch_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить агрегаты, ничего не изменяя",
+        )
+
+    def live_totals(self):
+        return {
+            (row["recipe__recipe_shopping_cart__user"], row["ingredient"]): (
+                row["total"]
+            )
+            for row in IngredientInRecipe.objects.filter(
+                recipe__recipe_shopping_cart__isnull=False
+            )
+            .values("recipe__recipe_shopping_cart__user", "ingredient")
+            .annotate(total=Sum("amount"))
+            .order_by()
+            .iterator()
+        }
+
+    def stored_totals(self):
+        return {
+            (user_id, ingredient_id): total_amount
+            for user_id, ingredient_id, total_amount in (
+                ShoppingCartItem.objects.values_list(
+                    "user", "ingredient", "total_amount"
+                ).iterator()
+            )
+        }
+
+    def handle(self, *args, **options):
+        live = self.live_totals()
+        if options["check"]:
+            stored = self.stored_totals()
+            mismatched = {
+                key
+                for key in {*live, *stored}
+                if live.get(key) != stored.get(key)
+            }
+            if mismatched:
+                raise CommandError(
+                    f"Расхождений в списке покупок: {len(mismatched)}"
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"Агрегаты совпадают: {len(live)}")
+            )
+            return
+        with transaction.atomic():
+            ShoppingCartItem.objects.all().delete()
+            bulk_create(
+                ShoppingCartItem,
+                (
+                    ShoppingCartItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=total,
+                    )
+                    for (user_id, ingredient_id), total in live.items()
+                ),
+                self.batch_size,
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересобрано позиций: {len(live)}")
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from api.counters import COUNTERS, actual_count
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет денормализованные счётчики (избранное, списки покупок, "
+        "рецепты и подписчики) с реальными данными и исправляет расхождения"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить счётчики, ничего не изменяя",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field, rows, link in COUNTERS:
+            expression = actual_count(rows, link)
+            mismatched = list(
+                model.objects.annotate(actual=expression)
+                .exclude(**{field: F("actual")})
+                .values_list("pk", flat=True)
+            )
+            total += len(mismatched)
+            if mismatched and not options["check"]:
+                model.objects.filter(pk__in=mismatched).update(
+                    **{field: expression}
+                )
+            self.stdout.write(
+                f"{model._meta.label}.{field}: расхождений {len(mismatched)}"
+            )
+        if options["check"] and total:
+            raise CommandError(f"Расхождений в счётчиках: {total}")
+        self.stdout.write(self.style.SUCCESS("Счётчики сверены"))
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.ranking import refresh_ranking
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рейтинги popular и trending по добавлениям в "
+        "избранное и корзины. Запускается периодически (например, cron)."
+    )
+
+    def handle(self, *args, **options):
+        for field, half_life in (
+            ("popularity", settings.RANKING_POPULAR_HALF_LIFE_DAYS),
+            ("trending", settings.RANKING_TRENDING_HALF_LIFE_DAYS),
+        ):
+            started = time.perf_counter()
+            changed = refresh_ranking(field, half_life)
+            self.stdout.write(
+                f"{field}: обновлено {changed} рецептов за "
+                f"{time.perf_counter() - started:.2f} с"
+            )
+        self.stdout.write(self.style.SUCCESS("Рейтинги пересчитаны"))
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_shopping_cart_items(apps, schema_editor):
+    IngredientInRecipe = apps.get_model('api', 'IngredientInRecipe')
+    ShoppingCartItem = apps.get_model('api', 'ShoppingCartItem')
+    rows = (
+        IngredientInRecipe.objects.filter(
+            recipe__recipe_shopping_cart__isnull=False
+        )
+        .values('recipe__recipe_shopping_cart__user', 'ingredient')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    ShoppingCartItem.objects.bulk_create(
+        ShoppingCartItem(
+            user_id=row['recipe__recipe_shopping_cart__user'],
+            ingredient_id=row['ingredient'],
+            total_amount=row['total'],
+        )
+        for row in rows.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0002_auto_20220317_1839'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.IntegerField(verbose_name='Общее количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_items', to='api.Ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Позиция списка покупок',
+                'verbose_name_plural': 'Список покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcartitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_cart_item'),
+        ),
+        migrations.RunPython(
+            backfill_shopping_cart_items, migrations.RunPython.noop
+        ),
+    ]
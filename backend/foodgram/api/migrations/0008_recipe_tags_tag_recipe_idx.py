@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_recipe_author_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX api_recipe_tags_tag_recipe_idx '
+            'ON api_recipe_tags (tag_id, recipe_id);',
+            reverse_sql='DROP INDEX api_recipe_tags_tag_recipe_idx;',
+        ),
+    ]
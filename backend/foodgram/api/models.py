@@ -1,31 +1,174 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models import Exists, OuterRef, Value
+from django.db.models import (Case, Exists, F, OuterRef, Prefetch, Sum, Value,
+                              When, Window)
+from django.db.models.functions import RowNumber
 
-from users.models import User
+from .sparse import FieldSpec
+from users.models import Subscription, User
+
+
+def subscribed_expression(user):
+    """Аннотация is_subscribed для запроса к авторам."""
+    if user.is_anonymous:
+        return Value(False, output_field=models.BooleanField())
+    return Exists(
+        Subscription.objects.filter(user=user, author__pk=OuterRef("pk"))
+    )
 
 
 class RecipeQueryset(models.QuerySet):
-    def annotate_user_flags(self, user):
+    def annotate_user_flags(
+        self, user, flags=("is_favorited", "is_in_shopping_cart")
+    ):
+        models_by_flag = {
+            "is_favorited": Favorite,
+            "is_in_shopping_cart": ShoppingCart,
+        }
         if user.is_anonymous:
             return self.annotate(
-                is_favorited=Value(False, output_field=models.BooleanField()),
-                is_in_shopping_cart=Value(
-                    False, output_field=models.BooleanField()
-                ),
+                **{
+                    flag: Value(False, output_field=models.BooleanField())
+                    for flag in flags
+                }
             )
         return self.annotate(
-            is_favorited=Exists(
-                Favorite.objects.filter(user=user, recipe__pk=OuterRef("pk"))
-            ),
-            is_in_shopping_cart=Exists(
-                ShoppingCart.objects.filter(
-                    user=user, recipe__pk=OuterRef("pk")
+            **{
+                flag: Exists(
+                    models_by_flag[flag].objects.filter(
+                        user=user, recipe__pk=OuterRef("pk")
+                    )
                 )
-            ),
+                for flag in flags
+            }
+        )
+
+    def top_per_author(self, limit):
+        if limit is None:
+            return self.order_by("author_id", "-pk")
+        ranked = self.annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=[F("author_id")],
+                order_by=F("pk").desc(),
+            )
+        )
+        sql, params = ranked.query.sql_with_params()
+        return self.model.objects.raw(
+            f"SELECT * FROM ({sql}) ranked WHERE ranked.position <= %s "
+            "ORDER BY ranked.author_id, ranked.position",
+            (*params, limit),
+        )
+
+    def with_related(self, user, spec=None):
+        """Prefetch и аннотации для ShowRecipeSerializer.
+
+        spec (FieldSpec) отключает то, что не попадёт в ответ.
+        """
+        spec = spec or FieldSpec()
+        lookups = []
+        if spec.includes("author") and spec.expanded("author"):
+            authors = User.objects.all()
+            if spec.nested("author").includes("is_subscribed"):
+                authors = authors.annotate(
+                    is_subscribed=subscribed_expression(user)
+                )
+            lookups.append(Prefetch("author", queryset=authors))
+        if spec.includes("tags"):
+            lookups.append("tags")
+        if spec.includes("ingredients"):
+            rows = IngredientInRecipe.objects.all()
+            if spec.expanded("ingredients"):
+                rows = rows.select_related("ingredient")
+            lookups.append(Prefetch("recipe_ingredients", queryset=rows))
+        queryset = self.prefetch_related(*lookups).annotate_user_flags(
+            user,
+            [
+                flag
+                for flag in ("is_favorited", "is_in_shopping_cart")
+                if spec.includes(flag)
+            ],
+        )
+        if spec.includes("text"):
+            return queryset
+        return queryset.defer("text")
+
+
+class ShoppingCartItemQueryset(models.QuerySet):
+    def apply_deltas(self, user_ids, deltas):
+        """Сдвигает общие количества ингредиентов у пользователей.
+
+        Недостающие строки сначала вставляются с нулём и пропуском
+        конфликтов, затем все строки обновляются одним UPDATE: так
+        параллельные добавления не падают на уникальном ограничении.
+        """
+        deltas = {
+            ingredient_id: delta
+            for ingredient_id, delta in deltas.items()
+            if delta
+        }
+        if not user_ids or not deltas:
+            return
+        self.bulk_create(
+            [
+                ShoppingCartItem(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=0,
+                )
+                for user_id in user_ids
+                for ingredient_id, delta in deltas.items()
+                if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        rows = self.filter(user_id__in=user_ids, ingredient_id__in=deltas)
+        rows.update(
+            total_amount=F("total_amount")
+            + Case(
+                *[
+                    When(ingredient_id=ingredient_id, then=Value(delta))
+                    for ingredient_id, delta in deltas.items()
+                ],
+                output_field=models.IntegerField(),
+            )
+        )
+        rows.filter(total_amount__lte=0).delete()
+
+    def add_recipes(self, user_ids, recipes):
+        self.apply_deltas(user_ids, recipe_amounts(recipes))
+
+    def change_recipe(self, user_ids, old_amounts, new_amounts):
+        self.apply_deltas(
+            user_ids,
+            {
+                ingredient_id: new_amounts.get(ingredient_id, 0)
+                - old_amounts.get(ingredient_id, 0)
+                for ingredient_id in {*old_amounts, *new_amounts}
+            },
+        )
+
+    def remove_recipes(self, user_ids, recipes):
+        self.apply_deltas(
+            user_ids,
+            {
+                ingredient_id: -amount
+                for ingredient_id, amount in recipe_amounts(recipes).items()
+            },
         )
 
 
+def recipe_amounts(recipes):
+    return dict(
+        IngredientInRecipe.objects.filter(recipe__in=recipes)
+        .order_by()
+        .values("ingredient_id")
+        .annotate(total=Sum("amount"))
+        .values_list("ingredient_id", "total")
+    )
+
+
 class Tag(models.Model):
     name = models.CharField(
         max_length=200, null=True, unique=True, verbose_name="Тег"
@@ -64,10 +207,16 @@ class Ingredient(models.Model):
 
 class Recipe(models.Model):
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="recipes"
+        User,
+        on_delete=models.CASCADE,
+        related_name="recipes",
+        db_index=False,
     )
     name = models.CharField(max_length=200)
     image = models.ImageField(upload_to="api/images/")
+    has_image_variants = models.BooleanField(
+        default=False, verbose_name="Превью изображения готовы"
+    )
     text = models.TextField()
     ingredients = models.ManyToManyField(
         Ingredient, through="IngredientInRecipe"
@@ -84,12 +233,32 @@ class Recipe(models.Model):
             MinValueValidator(1, "Время приготовления должно быть больше 0")
         ]
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0, verbose_name="В избранном"
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0, verbose_name="В списках покупок"
+    )
+    popularity = models.FloatField(default=0, verbose_name="Популярность")
+    trending = models.FloatField(
+        default=0, verbose_name="Набирает популярность"
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
     objects = RecipeQueryset.as_manager()
 
     class Meta:
         ordering = ("-pk",)
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(fields=["author", "-id"], name="recipe_author_idx"),
+            models.Index(
+                fields=["-popularity", "-id"], name="recipe_popular_idx"
+            ),
+            models.Index(
+                fields=["-trending", "-id"], name="recipe_trending_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -100,12 +269,14 @@ class IngredientInRecipe(models.Model):
         Ingredient,
         on_delete=models.CASCADE,
         verbose_name="Ингредиент в рецепте",
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         verbose_name="Рецепт",
         related_name="recipe_ingredients",
+        db_index=False,
     )
     amount = models.PositiveSmallIntegerField(
         validators=[
@@ -121,6 +292,11 @@ class IngredientInRecipe(models.Model):
                 fields=["ingredient", "recipe"], name="unique_ingredient"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "ingredient"], name="ingredient_recipe_idx"
+            )
+        ]
 
     def __str__(self):
         return f"{self.ingredient} in {self.recipe}"
@@ -132,12 +308,14 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         related_name="user_favorite",
         verbose_name="Пользователь",
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name="recipe_favorite",
         verbose_name="Избранный рецепт",
+        db_index=False,
     )
     date = models.DateTimeField(auto_now_add=True)
 
@@ -150,6 +328,14 @@ class Favorite(models.Model):
                 fields=["user", "recipe"], name="unique_favorite"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="favorite_recipe_user_idx"
+            ),
+            models.Index(
+                fields=["date", "recipe"], name="favorite_date_recipe_idx"
+            ),
+        ]
 
 
 class ShoppingCart(models.Model):
@@ -158,12 +344,14 @@ class ShoppingCart(models.Model):
         on_delete=models.CASCADE,
         related_name="user_shopping_cart",
         verbose_name="Пользователь",
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name="recipe_shopping_cart",
         verbose_name="рецепт в корзине",
+        db_index=False,
     )
     date = models.DateTimeField(auto_now_add=True)
 
@@ -176,6 +364,77 @@ class ShoppingCart(models.Model):
                 fields=["user", "recipe"], name="unique_shopping"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="cart_recipe_user_idx"
+            ),
+            models.Index(
+                fields=["date", "recipe"], name="cart_date_recipe_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.recipe} в корзине у {self.user}"
+
+
+class ShoppingCartItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_cart_items",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_cart_items",
+        verbose_name="Ингредиент",
+    )
+    total_amount = models.IntegerField(verbose_name="Общее количество")
+    objects = ShoppingCartItemQueryset.as_manager()
+
+    class Meta:
+        verbose_name = "Позиция списка покупок"
+        verbose_name_plural = "Список покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"], name="unique_cart_item"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.ingredient}: {self.total_amount} у {self.user}"
+
+
+class RecipeSignature(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="signature",
+        verbose_name="Рецепт",
+    )
+    minhash = models.BinaryField(verbose_name="MinHash-подпись")
+
+    class Meta:
+        verbose_name = "Подпись рецепта"
+        verbose_name_plural = "Подписи рецептов"
+
+
+class RecipeBucket(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="buckets",
+        verbose_name="Рецепт",
+    )
+    bucket = models.BigIntegerField(verbose_name="LSH-корзина")
+
+    class Meta:
+        verbose_name = "LSH-корзина рецепта"
+        verbose_name_plural = "LSH-корзины рецептов"
+        indexes = [
+            models.Index(
+                fields=["bucket", "recipe"], name="recipe_bucket_idx"
+            )
+        ]
@@ -1,6 +1,200 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+import math
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+
+
+def approximate_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        return int(cursor.fetchone()[0][0]["Plan"]["Plan Rows"])
+
+
+def plain_count(queryset):
+    """COUNT(*) по первичным ключам, без вычисления аннотаций.
+
+    Аннотации вроде is_favorited (Exists) иначе попали бы в подзапрос
+    подсчёта и вычислялись бы для каждой строки.
+    """
+    return queryset.values("pk").order_by().count()
+
+
+class PlainCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return plain_count(self.object_list)
+        return len(self.object_list)
+
+
+def keyset_filter(ordering, position):
+    """Строки после position в порядке ordering: сравнение кортежей.
+
+    Для ("-popularity", "-pk") это popularity < p OR (popularity = p AND
+    pk < k), поэтому равные оценки не мешают листать дальше.
+    """
+    condition, equal = Q(), {}
+    for field, value in zip(ordering, position):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        equal[name] = value
+    return condition
+
+
+def is_position_value(value):
+    """Все ключи сортировки курсора числовые: pk, рейтинги, search_rank."""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -(2 ** 63) <= value < 2 ** 63
+    return isinstance(value, float) and math.isfinite(value)
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith("-") else f"-{field}"
+        for field in ordering
+    )
+
+
+class KeysetPaginator(CursorPagination):
+    """Курсорная пагинация по составному ключу сортировки.
+
+    CursorPagination DRF хранит в курсоре только первое поле сортировки и
+    смещение среди строк с тем же значением, а смещение ограничено
+    offset_cutoff: на тысяче рецептов с одинаковым рейтингом страницы
+    ломаются. Здесь курсор хранит значения всех полей последней строки
+    (например, рейтинг и pk), и страница выбирается сравнением кортежей.
+    """
+
+    page_size = 5
+    page_size_query_param = "limit"
+    ordering = "-pk"
+    count_query_param = "count"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", self.ordering)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        if request.query_params.get(self.count_query_param) == "approximate":
+            self.count = approximate_count(queryset)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = (
+            reverse_ordering(self.ordering) if reverse else self.ordering
+        )
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                keyset_filter(ordering, self.decode_position(self.cursor))
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        if self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_position(self, cursor):
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+            or not all(map(is_position_value, position))
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def get_position(self, item):
+        return [
+            item[name] if isinstance(item, dict) else getattr(item, name)
+            for name in (field.lstrip("-") for field in self.ordering)
+        ]
+
+    def link(self, item, reverse):
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=reverse,
+                position=json.dumps(self.get_position(item)),
+            )
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data["count"] = self.count
+        return response
 
 
 class VariablePageSizePaginator(PageNumberPagination):
+    django_paginator_class = PlainCountPaginator
     page_size = 5
     page_size_query_param = "limit"
+    mode_query_param = "pagination"
+    keyset_paginator_class = KeysetPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_paginator = None
+        if self.keyset_paginator_class is not None and (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.keyset_paginator_class.cursor_query_param
+            in request.query_params
+        ):
+            self.keyset_paginator = self.keyset_paginator_class()
+            return self.keyset_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class PageNumberOnlyPaginator(VariablePageSizePaginator):
+    """Только постраничный режим: для списков, собранных в памяти.
+
+    Курсору нужен queryset, поэтому pagination=cursor и cursor здесь
+    игнорируются.
+    """
+
+    keyset_paginator_class = None
@@ -0,0 +1,70 @@
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+FONT_NAME = "FoodgramFont"
+CHUNK_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=None)
+def register_font(path):
+    pdfmetrics.registerFont(TTFont(FONT_NAME, path))
+    return FONT_NAME
+
+
+class PdfWriter:
+    """PDF списка покупок на reportlab.
+
+    Шрифт с кириллицей регистрируется один раз на процесс, в документ
+    reportlab встраивает только использованные глифы. Готовый документ
+    отдаётся частями по CHUNK_SIZE.
+    """
+
+    def __init__(self, font_path, font_size=12, page_size=A4, margin=50):
+        self.font_name = register_font(font_path)
+        self.font_size = font_size
+        self.leading = font_size * 1.4
+        self.page_size = page_size
+        self.width, self.height = page_size
+        self.margin = margin
+        self.lines_per_page = int(
+            (self.height - 2 * margin) // self.leading
+        )
+
+    def wrap(self, text):
+        return simpleSplit(
+            text,
+            self.font_name,
+            self.font_size,
+            self.width - 2 * self.margin,
+        ) or [""]
+
+    def new_page(self, canvas):
+        text = canvas.beginText(
+            self.margin, self.height - self.margin - self.font_size
+        )
+        text.setFont(self.font_name, self.font_size, self.leading)
+        return text
+
+    def stream(self, lines):
+        buffer = BytesIO()
+        canvas = Canvas(buffer, pagesize=self.page_size)
+        text, count = self.new_page(canvas), 0
+        for line in lines:
+            for wrapped in self.wrap(line):
+                if count == self.lines_per_page:
+                    canvas.drawText(text)
+                    canvas.showPage()
+                    text, count = self.new_page(canvas), 0
+                text.textLine(wrapped)
+                count += 1
+        canvas.drawText(text)
+        canvas.showPage()
+        canvas.save()
+        buffer.seek(0)
+        return iter(lambda: buffer.read(CHUNK_SIZE), b"")
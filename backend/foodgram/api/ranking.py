@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Favorite, Recipe, ShoppingCart
+
+SECONDS_PER_DAY = 24 * 60 * 60
+# Вклады старше стольких периодов полураспада (< 0.1 %) не учитываются
+# в быстро затухающем рейтинге.
+HORIZON_HALF_LIVES = 10
+
+
+def decay(age, half_life):
+    return 0.5 ** (age.total_seconds() / (half_life * SECONDS_PER_DAY))
+
+
+def add_scores(scores, rows, now, half_life, weight):
+    for recipe_id, date in rows:
+        scores[recipe_id] = scores.get(recipe_id, 0) + weight * decay(
+            now - date, half_life
+        )
+
+
+def compute_scores(half_life, now=None):
+    """Сумма добавлений в избранное и корзины с экспоненциальным затуханием.
+
+    Добавление в корзину весит RANKING_CART_WEIGHT, в избранное — 1.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=half_life * HORIZON_HALF_LIVES)
+    scores = {}
+    for model, weight in (
+        (Favorite, 1.0),
+        (ShoppingCart, settings.RANKING_CART_WEIGHT),
+    ):
+        add_scores(
+            scores,
+            model.objects.filter(date__gte=since)
+            .values_list("recipe_id", "date")
+            .iterator(),
+            now,
+            half_life,
+            weight,
+        )
+    return {recipe_id: round(score, 6) for recipe_id, score in scores.items()}
+
+
+def refresh_ranking(field, half_life, batch_size=1000, now=None):
+    """Записывает рейтинг в колонку field и возвращает число изменений."""
+    scores = compute_scores(half_life, now)
+    changed = [
+        Recipe(pk=recipe_id, **{field: scores.get(recipe_id, 0)})
+        for recipe_id, current in Recipe.objects.values_list(
+            "pk", field
+        ).iterator()
+        if current != scores.get(recipe_id, 0)
+    ]
+    Recipe.objects.bulk_update(changed, [field], batch_size=batch_size)
+    return len(changed)
@@ -0,0 +1,142 @@
+"""Быстрое чтение списков рецептов без сериализаторов DRF.
+
+Строит тот же JSON, что ShowRecipeSerializer, из .values(): страница
+рецептов читается одним запросом, теги, ингредиенты и авторы — ещё
+тремя (не запрошенные через ?fields= пропускаются), а словари собираются
+обычными функциями без создания моделей и вызова полей сериализатора.
+"""
+from .fields import image_url
+from .models import IngredientInRecipe, Tag, subscribed_expression
+from .sparse import FieldSpec
+from users.models import User
+
+RECIPE_FIELDS = (
+    "id",
+    "author_id",
+    "name",
+    "image",
+    "has_image_variants",
+    "cooking_time",
+)
+OPTIONAL_FIELDS = ("text", "is_favorited", "is_in_shopping_cart")
+
+
+def recipe_values(queryset, extra=(), spec=None):
+    """Queryset рецептов из with_related в виде словарей.
+
+    extra — дополнительные поля, например ключи курсорной сортировки.
+    """
+    spec = spec or FieldSpec()
+    fields = RECIPE_FIELDS + tuple(
+        field for field in OPTIONAL_FIELDS if spec.includes(field)
+    )
+    fields += tuple(field for field in extra if field not in fields)
+    return queryset.prefetch_related(None).values(*fields)
+
+
+def recipe_tags(recipe_ids, spec):
+    tags = {}
+    if not spec.includes("tags"):
+        return tags
+    rows = Tag.objects.filter(recipe__in=recipe_ids)
+    if not spec.expanded("tags"):
+        for recipe_id, tag_id in rows.values_list("recipe", "id"):
+            tags.setdefault(recipe_id, []).append(tag_id)
+        return tags
+    tag_spec = spec.nested("tags")
+    for recipe_id, tag_id, name, color, slug in rows.values_list(
+        "recipe", "id", "name", "color", "slug"
+    ):
+        tags.setdefault(recipe_id, []).append(
+            tag_spec.pick(
+                {"id": tag_id, "name": name, "color": color, "slug": slug}
+            )
+        )
+    return tags
+
+
+def recipe_ingredients(recipe_ids, spec):
+    ingredients = {}
+    if not spec.includes("ingredients"):
+        return ingredients
+    rows = IngredientInRecipe.objects.filter(recipe__in=recipe_ids)
+    if not spec.expanded("ingredients"):
+        for recipe_id, ingredient_id in rows.values_list(
+            "recipe_id", "ingredient_id"
+        ):
+            ingredients.setdefault(recipe_id, []).append(ingredient_id)
+        return ingredients
+    ingredient_spec = spec.nested("ingredients")
+    for recipe_id, ingredient_id, name, unit, amount in rows.values_list(
+        "recipe_id",
+        "ingredient_id",
+        "ingredient__name",
+        "ingredient__measurement_unit",
+        "amount",
+    ):
+        ingredients.setdefault(recipe_id, []).append(
+            ingredient_spec.pick(
+                {
+                    "id": ingredient_id,
+                    "name": name,
+                    "measurement_unit": unit,
+                    "amount": amount,
+                }
+            )
+        )
+    return ingredients
+
+
+def recipe_authors(author_ids, user, spec):
+    if not spec.includes("author") or not spec.expanded("author"):
+        return {}
+    author_spec = spec.nested("author")
+    authors = User.objects.filter(pk__in=author_ids)
+    fields = ["id", "email", "username", "first_name", "last_name"]
+    if author_spec.includes("is_subscribed"):
+        authors = authors.annotate(is_subscribed=subscribed_expression(user))
+        fields.append("is_subscribed")
+    return {
+        row["id"]: author_spec.pick(
+            {
+                "email": row["email"],
+                "id": row["id"],
+                "username": row["username"],
+                "first_name": row["first_name"],
+                "last_name": row["last_name"],
+                "is_subscribed": row.get("is_subscribed"),
+            }
+        )
+        for row in authors.values(*fields)
+    }
+
+
+def build_recipes(rows, request, image_variant=None, spec=None):
+    """Список словарей в формате ShowRecipeSerializer для строк values()."""
+    if not rows:
+        return []
+    spec = spec or FieldSpec()
+    recipe_ids = [row["id"] for row in rows]
+    tags = recipe_tags(recipe_ids, spec)
+    ingredients = recipe_ingredients(recipe_ids, spec)
+    authors = recipe_authors(
+        {row["author_id"] for row in rows}, request.user, spec
+    )
+    fields = {
+        "id": lambda row: row["id"],
+        "tags": lambda row: tags.get(row["id"], []),
+        "author": lambda row: authors.get(row["author_id"], row["author_id"]),
+        "ingredients": lambda row: ingredients.get(row["id"], []),
+        "is_favorited": lambda row: bool(row["is_favorited"]),
+        "is_in_shopping_cart": lambda row: bool(row["is_in_shopping_cart"]),
+        "name": lambda row: row["name"],
+        "image": lambda row: image_url(
+            row["image"], row["has_image_variants"], image_variant, request
+        ),
+        "text": lambda row: row["text"],
+        "cooking_time": lambda row: row["cooking_time"],
+    }
+    fields = [
+        (name, value) for name, value in fields.items() if spec.includes(name)
+    ]
+    return [{name: value(row) for name, value in fields} for row in rows]
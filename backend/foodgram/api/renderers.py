@@ -0,0 +1,127 @@
+import abc
+import csv
+
+import orjson
+from django.conf import settings
+from rest_framework import renderers
+
+from .pdf import PdfWriter
+from foodgram.metrics import TimedJSONRenderer
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(abc.ABC, renderers.BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Для скачивания используется stream(), который отдаёт документ по
+    частям; render() нужен DRF для ответов с ошибками.
+    """
+
+    title = "Список покупок:"
+    charset = "utf-8"
+    extension = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and "detail" in data:
+            data = [str(data["detail"])]
+        return b"".join(self.stream_lines(data or []))
+
+    @abc.abstractmethod
+    def stream_lines(self, lines):
+        """Кодирует строки списка в байты формата."""
+
+    def stream(self, ingredients):
+        return self.stream_lines(self.lines(ingredients))
+
+    def lines(self, ingredients):
+        yield self.title
+        yield "---"
+        for position, item in enumerate(ingredients, start=1):
+            yield (
+                f"{position}. {item['ingredient__name']}: "
+                f"{item['amount']}({item['ingredient__measurement_unit']})"
+            )
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = "text/plain"
+    format = "txt"
+    extension = "txt"
+
+    def stream_lines(self, lines):
+        for line in lines:
+            yield f"{line}\n".encode(self.charset)
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    extension = "csv"
+    header = ("Ингредиент", "Количество", "Ед. измерения")
+
+    def stream_lines(self, lines):
+        writer = csv.writer(Echo())
+        for line in lines:
+            yield writer.writerow((line,)).encode(self.charset)
+
+    def stream(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.header).encode(self.charset)
+        for item in ingredients:
+            yield writer.writerow(
+                (
+                    item["ingredient__name"],
+                    item["amount"],
+                    item["ingredient__measurement_unit"],
+                )
+            ).encode(self.charset)
+
+
+class ShoppingCartPDFRenderer(ShoppingCartRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
+    extension = "pdf"
+    charset = None
+    render_style = "binary"
+
+    def stream_lines(self, lines):
+        writer = PdfWriter(settings.SHOPPING_CART_FONT)
+        return writer.stream(lines)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer на orjson с тем же выводом, что у стандартного.
+
+    Компактный UTF-8 совпадает с настройками DRF по умолчанию; даты и
+    прочие типы, которые orjson кодирует иначе, отдаются кодировщику DRF,
+    а другие настройки и запросы с отступами — стандартному рендереру.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        content = orjson.dumps(
+            data, default=self.encoder_class().default, option=self.options
+        )
+        # Как и DRF, экранируем разделители строк, недопустимые в JS.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class TimedORJSONRenderer(TimedJSONRenderer, ORJSONRenderer):
+    pass
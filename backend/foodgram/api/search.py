@@ -0,0 +1,262 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .caching import catalogue_version
+from .models import Ingredient, IngredientInRecipe
+from foodgram.caches import cache_is_shared
+
+
+def trigrams(text):
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Отсортированный массив названий отвечает на поиск по префиксу, списки
+    вхождений триграмм сужают поиск по подстроке. Индекс строится при
+    первом запросе и перестраивается при смене версии справочника
+    ингредиентов, а на кэше одного процесса (см. foodgram.caches) — по
+    истечении INGREDIENT_INDEX_TTL.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.version = None
+        self.generation = 0
+        self.snapshot = ([], [], {})
+
+    def invalidate(self):
+        self.generation += 1
+        self.built_at = None
+
+    def is_stale(self):
+        if self.built_at is None:
+            return True
+        if self.version != catalogue_version(Ingredient)[0]:
+            return True
+        age = time.monotonic() - self.built_at
+        return not cache_is_shared() and age > settings.INGREDIENT_INDEX_TTL
+
+    def build(self):
+        generation = self.generation
+        version, _ = catalogue_version(Ingredient)
+        rows = sorted(
+            Ingredient.objects.values("id", "name", "measurement_unit"),
+            key=lambda row: (row["name"] or "").lower(),
+        )
+        keys = [(row["name"] or "").lower() for row in rows]
+        postings = {}
+        for position, key in enumerate(keys):
+            for trigram in trigrams(key):
+                postings.setdefault(trigram, array("I")).append(position)
+        self.snapshot = (rows, keys, postings)
+        if generation == self.generation:
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def ensure_built(self):
+        if self.is_stale():
+            with self.lock:
+                if self.is_stale():
+                    self.build()
+        return self.snapshot
+
+    @staticmethod
+    def prefix_positions(keys, query):
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        return range(start, end)
+
+    @staticmethod
+    def substring_positions(keys, postings, query):
+        if len(query) < 3:
+            return (
+                position
+                for position, key in enumerate(keys)
+                if query in key
+            )
+        lists = sorted(
+            (postings.get(trigram, ()) for trigram in trigrams(query)),
+            key=len,
+        )
+        candidates = set(lists[0])
+        for positions in lists[1:]:
+            candidates.intersection_update(positions)
+            if not candidates:
+                break
+        return (
+            position
+            for position in sorted(candidates)
+            if query in keys[position]
+        )
+
+    def search(self, query):
+        rows, keys, postings = self.ensure_built()
+        query = query.lower()
+        if not query:
+            return rows
+        return [
+            rows[position] for position in self.prefix_positions(keys, query)
+        ] + [
+            rows[position]
+            for position in self.substring_positions(keys, postings, query)
+            if not keys[position].startswith(query)
+        ]
+
+
+ingredient_index = IngredientIndex()
+
+
+class RecipeIngredientIndex:
+    """Обратный индекс ингредиент → рецепты для подбора «из того, что есть».
+
+    Для каждого ингредиента хранится отсортированный массив id рецептов,
+    для каждого рецепта — число его ингредиентов, так что подбор сводится
+    к подсчёту вхождений по спискам в памяти вместо GROUP BY по
+    IngredientInRecipe. Записи рецептов попадают в журнал изменений в
+    кэше; каждый процесс перед запросом перечитывает из БД только
+    изменённые рецепты. Если журнал потерян (или истёк
+    RECIPE_INGREDIENT_INDEX_TTL), индекс строится заново. На кэше одного
+    процесса (см. foodgram.caches) индекс живёт не дольше
+    INGREDIENT_INDEX_TTL, как индекс ингредиентов.
+    """
+
+    sequence_key = "recipe-ingredients:sequence"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.sequence = 0
+        self.postings = {}
+        self.ingredients = {}
+
+    @classmethod
+    def change_key(cls, sequence):
+        return f"recipe-ingredients:change:{sequence}"
+
+    @classmethod
+    def current_sequence(cls):
+        return cache.get(cls.sequence_key, 0)
+
+    @classmethod
+    def record_change(cls, recipe_ids):
+        cache.add(cls.sequence_key, 0, None)
+        sequence = cache.incr(cls.sequence_key)
+        cache.set(
+            cls.change_key(sequence),
+            list(recipe_ids),
+            settings.RECIPE_INGREDIENT_INDEX_TTL,
+        )
+
+    def is_stale(self):
+        if self.built_at is None:
+            return True
+        ttl = (
+            settings.RECIPE_INGREDIENT_INDEX_TTL
+            if cache_is_shared()
+            else settings.INGREDIENT_INDEX_TTL
+        )
+        return time.monotonic() - self.built_at > ttl
+
+    def build(self):
+        sequence = self.current_sequence()
+        postings, ingredients = {}, {}
+        rows = (
+            IngredientInRecipe.objects.order_by("recipe_id")
+            .values_list("recipe_id", "ingredient_id")
+            .iterator()
+        )
+        for recipe_id, ingredient_id in rows:
+            postings.setdefault(ingredient_id, array("I")).append(recipe_id)
+            ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+        self.postings, self.ingredients = postings, ingredients
+        self.sequence = sequence
+        self.built_at = time.monotonic()
+
+    def remove(self, recipe_id):
+        for ingredient_id in self.ingredients.pop(recipe_id, ()):
+            recipes = self.postings[ingredient_id]
+            del recipes[bisect_left(recipes, recipe_id)]
+            if not recipes:
+                del self.postings[ingredient_id]
+
+    def refresh(self, recipe_ids):
+        for recipe_id in recipe_ids:
+            self.remove(recipe_id)
+        rows = IngredientInRecipe.objects.filter(
+            recipe__in=recipe_ids
+        ).values_list("recipe_id", "ingredient_id")
+        for recipe_id, ingredient_id in rows:
+            insort(
+                self.postings.setdefault(ingredient_id, array("I")),
+                recipe_id,
+            )
+            self.ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+
+    def catch_up(self):
+        sequence = self.current_sequence()
+        if sequence == self.sequence:
+            return True
+        if sequence < self.sequence:
+            return False
+        keys = [
+            self.change_key(number)
+            for number in range(self.sequence + 1, sequence + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return False
+        self.refresh(
+            {recipe_id for ids in changes.values() for recipe_id in ids}
+        )
+        self.sequence = sequence
+        return True
+
+    def ensure_current(self):
+        if self.is_stale() or not self.catch_up():
+            self.build()
+
+    def match(self, include, exclude=(), missing=0):
+        """Рецепты, в которых из ингредиентов include нет не больше missing.
+
+        Возвращает пары (id рецепта, число недостающих ингредиентов),
+        отсортированные по недостающим и затем по новизне.
+        """
+        with self.lock:
+            self.ensure_current()
+            hits = Counter()
+            for ingredient_id in set(include):
+                hits.update(self.postings.get(ingredient_id, ()))
+            excluded = set()
+            for ingredient_id in set(exclude):
+                excluded.update(self.postings.get(ingredient_id, ()))
+            found = [
+                (recipe_id, len(self.ingredients[recipe_id]) - count)
+                for recipe_id, count in hits.items()
+                if recipe_id not in excluded
+                and len(self.ingredients[recipe_id]) - count <= missing
+            ]
+        found.sort(key=lambda item: (item[1], -item[0]))
+        return found
+
+
+recipe_ingredient_index = RecipeIngredientIndex()
+
+
+def recipe_ingredients_changed(recipe_ids):
+    """Записывает изменение состава рецептов после коммита транзакции."""
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(
+        lambda: RecipeIngredientIndex.record_change(recipe_ids)
+    )
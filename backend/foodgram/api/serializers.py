@@ -1,16 +1,25 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from .counters import change_counter
+from .fields import RecipeImageField
+from .fulltext import update_search_index
+from .images import schedule_variants
 from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingCart, Tag)
+                     ShoppingCart, ShoppingCartItem, Tag)
+from .search import recipe_ingredients_changed
+from .similarity import update_signatures
+from .sparse import FieldSpec, SparseFieldsMixin
 from users.serializers import UserSerializer
 
 User = get_user_model()
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = (
@@ -27,7 +36,9 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit")
 
 
-class IngredientInRecipeSerializer(serializers.ModelSerializer):
+class IngredientInRecipeSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     id = serializers.ReadOnlyField(source="ingredient.id")
     name = serializers.ReadOnlyField(source="ingredient.name")
     measurement_unit = serializers.ReadOnlyField(
@@ -44,16 +55,30 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         )
 
 
-class ShowRecipeSerializer(serializers.ModelSerializer):
+class ShowRecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = UserSerializer(read_only=True)
-    ingredients = serializers.SerializerMethodField("get_ingredients")
-    is_favorited = serializers.SerializerMethodField(
-        method_name="get_is_favorited", read_only=True
-    )
-    is_in_shopping_cart = serializers.SerializerMethodField(
-        method_name="get_is_in_shopping_cart", read_only=True
+    ingredients = IngredientInRecipeSerializer(
+        source="recipe_ingredients", many=True, read_only=True
     )
+    is_favorited = serializers.BooleanField(read_only=True)
+    is_in_shopping_cart = serializers.BooleanField(read_only=True)
+    image = RecipeImageField()
+    collapsed_fields = {
+        "tags": partial(
+            serializers.PrimaryKeyRelatedField, many=True, read_only=True
+        ),
+        "author": partial(
+            serializers.PrimaryKeyRelatedField, read_only=True
+        ),
+        "ingredients": partial(
+            serializers.SlugRelatedField,
+            source="recipe_ingredients",
+            slug_field="ingredient_id",
+            many=True,
+            read_only=True,
+        ),
+    }
 
     class Meta:
         model = Recipe
@@ -70,27 +95,9 @@ class ShowRecipeSerializer(serializers.ModelSerializer):
             "cooking_time",
         )
 
-    def get_ingredients(self, recipe):
-        qs = IngredientInRecipe.objects.filter(recipe=recipe)
-        return IngredientInRecipeSerializer(qs, many=True).data
-
-    def get_is_favorited(self, recipe):
-        if self.context.get("request").user.is_anonymous:
-            return False
-        return Favorite.objects.filter(
-            user=self.context.get("request").user, recipe=recipe
-        ).exists()
-
-    def get_is_in_shopping_cart(self, recipe):
-        if self.context.get("request").user.is_anonymous:
-            return False
-        return ShoppingCart.objects.filter(
-            user=self.context.get("request").user, recipe=recipe
-        ).exists()
-
 
 class AddIngredientToRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=1)
 
     class Meta:
@@ -148,6 +155,14 @@ class RecordRecipeSerializer(serializers.ModelSerializer):
         setarr = set(arr)
         if len(arr) != len(setarr):
             raise serializers.ValidationError("Ингредиенты повторяются")
+        ingredients = Ingredient.objects.in_bulk(setarr)
+        missing = setarr - ingredients.keys()
+        if missing:
+            raise serializers.ValidationError(
+                f"Ингредиенты не найдены: {sorted(missing)}"
+            )
+        for ingredient_item in value:
+            ingredient_item["id"] = ingredients[ingredient_item["id"]]
         return value
 
     @transaction.atomic
@@ -157,33 +172,121 @@ class RecordRecipeSerializer(serializers.ModelSerializer):
         author = self.context.get("request").user
         recipe = Recipe.objects.create(author=author, **validated_data)
         recipe.save()
+        change_counter(User.objects.filter(pk=author.pk), "recipes_count", 1)
         recipe.tags.set(tags_data)
         self.create_bulk_ingredients(recipe, ingredients_data)
+        update_search_index([recipe.pk])
+        recipe_ingredients_changed([recipe.pk])
+        update_signatures([recipe.pk])
+        schedule_variants(recipe)
         return recipe
 
-    def create_ingredients(self, ingredients, recipe):
-        for ingredient in ingredients:
-            IngredientInRecipe.objects.create(
-                recipe=recipe,
-                ingredient=ingredient["id"],
-                amount=ingredient["amount"],
+    def update_tags(self, recipe, tags):
+        through = Recipe.tags.through
+        current = set(
+            through.objects.filter(recipe=recipe).values_list(
+                "tag_id", flat=True
             )
-
-    def create_tags(self, tags, recipe):
-        for tag in tags:
-            recipe.tags.add(tag)
+        )
+        wanted = {tag.pk for tag in tags}
+        if current == wanted:
+            return False
+        if current - wanted:
+            through.objects.filter(
+                recipe=recipe, tag_id__in=current - wanted
+            ).delete()
+        through.objects.bulk_create(
+            [
+                through(recipe=recipe, tag_id=tag_id)
+                for tag_id in wanted - current
+            ]
+        )
+        return True
+
+    def update_ingredients(self, recipe, ingredients_data):
+        """Применяет к рецепту только отличающиеся строки ингредиентов.
+
+        Возвращает количества до и после изменения для пересчёта
+        списков покупок.
+        """
+        rows = {
+            row.ingredient_id: row for row in recipe.recipe_ingredients.all()
+        }
+        old_amounts = {
+            ingredient_id: row.amount for ingredient_id, row in rows.items()
+        }
+        new_amounts = {
+            item["id"].pk: int(item["amount"]) for item in ingredients_data
+        }
+        removed = old_amounts.keys() - new_amounts.keys()
+        if removed:
+            IngredientInRecipe.objects.filter(
+                pk__in=[rows[ingredient_id].pk for ingredient_id in removed]
+            ).delete()
+        changed = []
+        for ingredient_id, amount in new_amounts.items():
+            row = rows.get(ingredient_id)
+            if row is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ["amount"])
+        IngredientInRecipe.objects.bulk_create(
+            [
+                IngredientInRecipe(
+                    recipe=recipe, ingredient_id=ingredient_id, amount=amount
+                )
+                for ingredient_id, amount in new_amounts.items()
+                if ingredient_id not in rows
+            ]
+        )
+        return old_amounts, new_amounts
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        IngredientInRecipe.objects.filter(recipe=instance).all().delete()
-        self.create_tags(validated_data.pop("tags"), instance)
-        self.create_ingredients(validated_data.pop("ingredients"), instance)
-        return super().update(instance, validated_data)
+        features_changed = False
+        if "tags" in validated_data:
+            features_changed = self.update_tags(
+                instance, validated_data.pop("tags")
+            )
+        if "ingredients" in validated_data:
+            old_amounts, new_amounts = self.update_ingredients(
+                instance, validated_data.pop("ingredients")
+            )
+            if old_amounts.keys() != new_amounts.keys():
+                features_changed = True
+                recipe_ingredients_changed([instance.pk])
+            if old_amounts != new_amounts:
+                ShoppingCartItem.objects.change_recipe(
+                    list(
+                        instance.recipe_shopping_cart.values_list(
+                            "user", flat=True
+                        )
+                    ),
+                    old_amounts,
+                    new_amounts,
+                )
+        if "image" in validated_data:
+            validated_data["has_image_variants"] = False
+        # Счётчики, рейтинги и флаг вариантов меняются параллельно через
+        # update(): полный save() снимка вернул бы их старые значения.
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=list(validated_data))
+        update_search_index([instance.pk])
+        if features_changed:
+            update_signatures([instance.pk])
+        if "image" in validated_data:
+            schedule_variants(instance)
+        return instance
 
     def to_representation(self, instance):
+        request = self.context.get("request")
         return ShowRecipeSerializer(
-            instance, context={"request": self.context.get("request")}
+            Recipe.objects.with_related(
+                request.user, FieldSpec.from_request(request)
+            ).get(pk=instance.pk),
+            context={"request": request},
         ).data
 
 
@@ -198,10 +301,50 @@ class FavoriteSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         request = self.context.get("request")
         return ShowRecipeSerializer(
-            instance.recipe, context={"request": request}
+            Recipe.objects.with_related(
+                request.user, FieldSpec.from_request(request)
+            ).get(
+                pk=instance.recipe_id
+            ),
+            context={"request": request},
         ).data
 
 
 class ShoppingCartSerializer(FavoriteSerializer):
     class Meta(FavoriteSerializer.Meta):
         model = ShoppingCart
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+
+    def validate_recipes(self, value):
+        ids = set(value)
+        missing = ids - set(
+            Recipe.objects.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        if missing:
+            raise serializers.ValidationError(
+                f"Рецепты не найдены: {sorted(missing)}"
+            )
+        return sorted(ids)
+
+
+class PantrySearchSerializer(serializers.Serializer):
+    include = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+    exclude = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        max_length=100,
+    )
+    missing = serializers.IntegerField(
+        min_value=0, max_value=20, default=0
+    )
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .caching import bump_catalogue_version
+from .fulltext import remove_from_search_index
+from .models import Ingredient, Recipe, ShoppingCart, ShoppingCartItem, Tag
+from .search import ingredient_index
+
+cart_batch = ContextVar("cart_batch", default=False)
+
+
+@contextmanager
+def batched_cart_changes():
+    """Отключает пересчёт агрегата по строкам: его сдвигают одним вызовом."""
+    token = cart_batch.set(True)
+    try:
+        yield
+    finally:
+        cart_batch.reset(token)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_catalogue(sender, **kwargs):
+    bump_catalogue_version(sender)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_cart_items(instance, created, **kwargs):
+    if created and not cart_batch.get():
+        ShoppingCartItem.objects.add_recipes(
+            [instance.user_id], [instance.recipe_id]
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_cart_items(instance, **kwargs):
+    """Вычитает рецепт из агрегата при любом удалении из корзины.
+
+    pre_delete срабатывает и для удалений из админки, и для каскадов при
+    удалении рецепта или пользователя, пока состав рецепта ещё в базе.
+    """
+    if not cart_batch.get():
+        ShoppingCartItem.objects.remove_recipes(
+            [instance.user_id], [instance.recipe_id]
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_search_document(instance, **kwargs):
+    remove_from_search_index([instance.pk])
@@ -0,0 +1,161 @@
+"""Похожие рецепты: MinHash-подписи наборов ингредиентов и тегов с LSH.
+
+Подпись рецепта — минимумы PERMUTATIONS хэш-функций по его признакам
+(ингредиенты и теги). Подпись делится на BANDS полос, хэш каждой полосы —
+LSH-корзина в RecipeBucket; кандидаты в похожие — рецепты с хотя бы одной
+общей корзиной, а доля совпавших значений подписей оценивает коэффициент
+Жаккара. Так похожие рецепты находятся по индексу, без попарного сравнения
+составов.
+"""
+import hashlib
+import random
+from array import array
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import IngredientInRecipe, Recipe, RecipeBucket, RecipeSignature
+
+PERMUTATIONS = 64
+BANDS = 32
+ROWS = PERMUTATIONS // BANDS
+PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 64) - 1
+
+
+def permutation_coefficients(seed=0):
+    """Коэффициенты a, b функций (a * x + b) mod PRIME, одинаковые везде."""
+    rng = random.Random(seed)
+    return tuple(
+        (rng.randrange(1, PRIME), rng.randrange(0, PRIME))
+        for _ in range(PERMUTATIONS)
+    )
+
+
+COEFFICIENTS = permutation_coefficients()
+
+
+def stable_hash(value):
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def recipe_features(recipe_ids):
+    """Признаки рецептов: id ингредиентов и тегов, по два запроса."""
+    features = {recipe_id: set() for recipe_id in recipe_ids}
+    rows = IngredientInRecipe.objects.filter(
+        recipe__in=recipe_ids
+    ).values_list("recipe_id", "ingredient_id")
+    for recipe_id, ingredient_id in rows:
+        features[recipe_id].add(f"i{ingredient_id}")
+    rows = Recipe.tags.through.objects.filter(
+        recipe__in=recipe_ids
+    ).values_list("recipe_id", "tag_id")
+    for recipe_id, tag_id in rows:
+        features[recipe_id].add(f"t{tag_id}")
+    return features
+
+
+def minhash(features):
+    hashes = [stable_hash(feature) for feature in features]
+    if not hashes:
+        return array("Q", [MAX_HASH] * PERMUTATIONS)
+    return array(
+        "Q",
+        [
+            min((a * value + b) % PRIME for value in hashes)
+            for a, b in COEFFICIENTS
+        ],
+    )
+
+
+def signatures(features):
+    """Подписи для словаря {id рецепта: признаки}; работает без БД."""
+    return {
+        recipe_id: minhash(items).tobytes()
+        for recipe_id, items in features.items()
+    }
+
+
+def buckets(signature):
+    values = array("Q")
+    values.frombytes(bytes(signature))
+    result = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(
+            values[band * ROWS:(band + 1) * ROWS].tobytes(),
+            digest_size=8,
+            person=band.to_bytes(2, "big"),
+        ).digest()
+        result.append(int.from_bytes(digest, "big", signed=True))
+    return result
+
+
+def similarity(left, right):
+    first, second = array("Q"), array("Q")
+    first.frombytes(bytes(left))
+    second.frombytes(bytes(right))
+    return sum(a == b for a, b in zip(first, second)) / PERMUTATIONS
+
+
+def store_signatures(computed):
+    """Сохраняет подписи {id рецепта: bytes} и заменяет их корзины."""
+    recipe_ids = list(computed)
+    RecipeBucket.objects.filter(recipe__in=recipe_ids).delete()
+    RecipeSignature.objects.filter(recipe__in=recipe_ids).delete()
+    existing = set(
+        Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True)
+    )
+    RecipeSignature.objects.bulk_create(
+        [
+            RecipeSignature(recipe_id=recipe_id, minhash=signature)
+            for recipe_id, signature in computed.items()
+            if recipe_id in existing
+        ]
+    )
+    RecipeBucket.objects.bulk_create(
+        [
+            RecipeBucket(recipe_id=recipe_id, bucket=bucket)
+            for recipe_id, signature in computed.items()
+            if recipe_id in existing
+            for bucket in buckets(signature)
+        ]
+    )
+
+
+def update_signatures(recipe_ids):
+    store_signatures(signatures(recipe_features(recipe_ids)))
+
+
+def similar_recipes(recipe_id, limit):
+    """Пары (id рецепта, оценка сходства) по убыванию сходства.
+
+    Кандидаты — рецепты с наибольшим числом общих корзин: их доля
+    растёт вместе со сходством, поэтому отсечение по
+    SIMILAR_RECIPES_CANDIDATES отбрасывает наименее похожие. Подписи
+    пишут создание и изменение рецепта и команда
+    rebuild_recipe_signatures; рецепт без подписи похожих не имеет.
+    """
+    signature = (
+        RecipeSignature.objects.filter(recipe=recipe_id)
+        .values_list("minhash", flat=True)
+        .first()
+    )
+    if signature is None:
+        return []
+    candidates = (
+        RecipeBucket.objects.filter(bucket__in=buckets(signature))
+        .exclude(recipe=recipe_id)
+        .values("recipe")
+        .annotate(shared=Count("id"))
+        .order_by("-shared", "-recipe_id")
+        .values_list("recipe", flat=True)[:settings.SIMILAR_RECIPES_CANDIDATES]
+    )
+    scored = [
+        (candidate, similarity(signature, minhash_value))
+        for candidate, minhash_value in RecipeSignature.objects.filter(
+            recipe__in=candidates
+        ).values_list("recipe", "minhash")
+    ]
+    scored.sort(key=lambda item: (-item[1], -item[0]))
+    return scored[:limit]
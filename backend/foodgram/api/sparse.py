@@ -0,0 +1,102 @@
+"""Разреженные ответы: параметры ?fields= и ?expand=.
+
+fields — поля ответа через запятую, поля вложенных объектов через точку
+(author.username); expand — связи, которые отдаются объектами. Без fields
+ответ не меняется. Если fields задан, связь, для которой не указаны ни
+вложенные поля, ни expand, отдаётся id, а не объектом. По тем же
+правилам представления и queryset'ы решают, какие prefetch и аннотации
+нужны.
+"""
+from rest_framework.serializers import ListSerializer
+
+
+def split_paths(paths):
+    tree = {}
+    for path in paths:
+        path = path.strip()
+        if not path:
+            continue
+        name, _, rest = path.partition(".")
+        tree.setdefault(name, [])
+        if rest:
+            tree[name].append(rest)
+    return tree
+
+
+class FieldSpec:
+    fields_param = "fields"
+    expand_param = "expand"
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = None if fields is None else split_paths(fields)
+        self.expand = split_paths(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None:
+            return cls()
+        params = request.query_params
+        fields = params.get(cls.fields_param)
+        return cls(
+            fields.split(",") if fields else None,
+            params.get(cls.expand_param, "").split(","),
+        )
+
+    def includes(self, name):
+        return (
+            self.fields is None or name in self.fields or name in self.expand
+        )
+
+    def expanded(self, name):
+        return (
+            self.fields is None
+            or name in self.expand
+            or bool(self.fields.get(name))
+        )
+
+    def nested(self, name):
+        paths = (self.fields or {}).get(name)
+        return FieldSpec(paths or None, self.expand.get(name, ()))
+
+    def pick(self, item):
+        if self.fields is None:
+            return item
+        return {
+            key: value for key, value in item.items() if self.includes(key)
+        }
+
+
+class SparseFieldsMixin:
+    """Отбирает поля сериализатора по FieldSpec.
+
+    Корневой сериализатор берёт спецификацию из запроса, вложенным её
+    передаёт родитель. collapsed_fields задаёт, каким полем заменить
+    связь, которую не нужно раскрывать.
+    """
+
+    collapsed_fields = {}
+    field_spec = None
+
+    def get_field_spec(self):
+        if self.field_spec is not None:
+            return self.field_spec
+        if self.parent is None or (
+            isinstance(self.parent, ListSerializer)
+            and self.parent is self.root
+        ):
+            return FieldSpec.from_request(self.context.get("request"))
+        return FieldSpec()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self.get_field_spec()
+        for name in list(fields):
+            if not spec.includes(name):
+                del fields[name]
+            elif not spec.expanded(name) and name in self.collapsed_fields:
+                fields[name] = self.collapsed_fields[name]()
+            else:
+                nested = getattr(fields[name], "child", fields[name])
+                if isinstance(nested, SparseFieldsMixin):
+                    nested.field_spec = spec.nested(name)
+        return fields
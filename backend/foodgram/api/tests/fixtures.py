@@ -0,0 +1,70 @@
+import atexit
+import shutil
+import tempfile
+
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.models import Ingredient, IngredientInRecipe, Recipe
+from users.models import User
+
+SHARED_CACHE_DIR = tempfile.mkdtemp(prefix="foodgram-test-cache-")
+atexit.register(shutil.rmtree, SHARED_CACHE_DIR, True)
+
+# Файловый кэш виден всем процессам, как Redis в docker-compose.
+shared_cache = override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": SHARED_CACHE_DIR,
+        }
+    }
+)
+
+
+def create_user(username, **fields):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password",
+        **fields,
+    )
+
+
+def create_ingredients(count):
+    Ingredient.objects.bulk_create(
+        [
+            Ingredient(name=f"Ингредиент {index}", measurement_unit="г")
+            for index in range(count)
+        ]
+    )
+    return list(Ingredient.objects.order_by("id"))
+
+
+def create_recipe(author, name, ingredients=None, **fields):
+    """Рецепт с ингредиентами из словаря {ингредиент: количество}."""
+    fields.setdefault("cooking_time", 10)
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text="Описание",
+        image="api/images/test.png",
+        **fields,
+    )
+    IngredientInRecipe.objects.bulk_create(
+        [
+            IngredientInRecipe(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for ingredient, amount in (ingredients or {}).items()
+        ]
+    )
+    return recipe
+
+
+def token_client(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return client
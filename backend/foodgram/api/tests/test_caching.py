@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.caching import bump_catalogue_version
+from api.models import Ingredient, Tag
+from api.search import ingredient_index
+from api.tests.fixtures import shared_cache
+
+
+class CatalogueCacheTest(TestCase):
+    """Справочники кэшируются только на общем для процессов кэше."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name="Завтрак", color="#000000", slug="breakfast")
+
+    def get_tags(self):
+        response = self.client.get("/api/tags/")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_per_process_cache_is_not_used(self):
+        self.get_tags()
+        with self.assertNumQueries(1):
+            self.get_tags()
+
+    @shared_cache
+    def test_shared_cache(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        bump_catalogue_version(Tag)
+        self.get_tags()
+        with self.assertNumQueries(0):
+            etag = self.get_tags()["ETag"]
+        Tag.objects.create(name="Обед", color="#111111", slug="lunch")
+        with self.assertNumQueries(1):
+            self.assertNotEqual(self.get_tags()["ETag"], etag)
+
+    @shared_cache
+    def test_ingredients_follow_catalogue_version(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        ingredient_index.invalidate()
+        path = "/api/ingredients/?name=zzz"
+        self.assertEqual(self.client.get(path).json(), [])
+        # bulk_create без сигналов, как load_ingredients в другом процессе.
+        Ingredient.objects.bulk_create(
+            [Ingredient(name="zzz новый", measurement_unit="г")]
+        )
+        bump_catalogue_version(Ingredient)
+        response = self.client.get(path)
+        self.assertEqual(
+            [item["name"] for item in response.json()], ["zzz новый"]
+        )
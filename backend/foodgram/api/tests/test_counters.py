@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.models import Favorite, Recipe, ShoppingCart
+from api.tests.fixtures import create_recipe, create_user, token_client
+from users.models import User
+
+
+class CountersTest(TestCase):
+    """Счётчики сдвигаются только на реально вставленные и удалённые строки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = create_user("user"), create_user("author")
+        cls.recipes = [
+            create_recipe(cls.author, f"Рецепт {index}") for index in range(3)
+        ]
+        User.objects.filter(pk=cls.author.pk).update(recipes_count=3)
+
+    def setUp(self):
+        self.client = token_client(self.user)
+
+    def assert_counters(self):
+        call_command("reconcile_counters", "--check", stdout=StringIO())
+
+    def test_bulk_add_skips_existing_rows(self):
+        first, second, third = self.recipes
+        Favorite.objects.create(user=self.user, recipe=first)
+        Recipe.objects.filter(pk=first.pk).update(favorites_count=1)
+        response = self.client.post(
+            "/api/recipes/favorite/",
+            {"recipes": [first.pk, second.pk, second.pk, third.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["added"], [second.pk, third.pk])
+        self.assertEqual(response.data["existing"], [first.pk])
+        self.assert_counters()
+        response = self.client.delete(
+            "/api/recipes/favorite/",
+            {"recipes": [first.pk, second.pk]},
+            format="json",
+        )
+        self.assertEqual(response.data["removed"], [first.pk, second.pk])
+        self.assert_counters()
+
+    def test_repeated_delete(self):
+        recipe = self.recipes[0]
+        path = f"/api/recipes/{recipe.pk}/shopping_cart/"
+        self.assertEqual(self.client.post(path).status_code, 201)
+        self.assertEqual(self.client.delete(path).status_code, 204)
+        self.assertEqual(self.client.delete(path).status_code, 404)
+        self.assertFalse(ShoppingCart.objects.exists())
+        self.assert_counters()
+
+    def test_subscription_and_recipe_delete(self):
+        path = f"/api/users/{self.author.pk}/subscribe/"
+        self.assertEqual(self.client.post(path).status_code, 201)
+        self.assertEqual(self.client.delete(path).status_code, 204)
+        self.assertEqual(self.client.delete(path).status_code, 404)
+        self.assert_counters()
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(f"/api/recipes/{self.recipes[0].pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assert_counters()
@@ -0,0 +1,89 @@
+import csv
+import os
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import ShoppingCart
+from api.tests.fixtures import (create_ingredients, create_recipe, create_user,
+                                token_client)
+
+
+class DownloadShoppingCartTest(TestCase):
+    """Список покупок отдаётся в txt, csv и pdf по формату или Accept."""
+
+    path = "/api/recipes/download_shopping_cart/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("user")
+        salt, flour = create_ingredients(2)
+        for amounts in ({salt: 2, flour: 100}, {flour: 50}):
+            recipe = create_recipe(cls.user, "Рецепт", amounts)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        self.client = token_client(self.user)
+
+    def download(self, query="", **headers):
+        response = self.client.get(f"{self.path}{query}", **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_text_is_default(self):
+        response, body = self.download()
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertEqual(
+            response["Content-Disposition"],
+            "attachment;filename=shopping_cart.txt",
+        )
+        self.assertEqual(
+            body.decode().splitlines(),
+            [
+                "Список покупок:",
+                "---",
+                "1. Ингредиент 0: 2(г)",
+                "2. Ингредиент 1: 150(г)",
+            ],
+        )
+
+    def test_csv(self):
+        for query, headers in (
+            ("?format=csv", {}),
+            ("", {"HTTP_ACCEPT": "text/csv"}),
+        ):
+            with self.subTest(query=query, headers=headers):
+                response, body = self.download(query, **headers)
+                self.assertEqual(
+                    response["Content-Type"], "text/csv; charset=utf-8"
+                )
+                self.assertEqual(
+                    list(csv.reader(StringIO(body.decode()))),
+                    [
+                        ["Ингредиент", "Количество", "Ед. измерения"],
+                        ["Ингредиент 0", "2", "г"],
+                        ["Ингредиент 1", "150", "г"],
+                    ],
+                )
+
+    @skipUnless(
+        os.path.exists(settings.SHOPPING_CART_FONT), "нет шрифта для PDF"
+    )
+    def test_pdf(self):
+        response, body = self.download("?format=pdf")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(body.startswith(b"%PDF"))
+        self.assertTrue(body.rstrip().endswith(b"%%EOF"))
+
+    def test_unsupported_format(self):
+        response = self.client.get(f"{self.path}?format=xml")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.path, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 406)
+
+    def test_anonymous(self):
+        response = APIClient().get(self.path)
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from api.models import Tag
+from api.tests.fixtures import create_recipe, create_user
+
+
+class TagFilterTest(TestCase):
+    """tags_mode=any отдаёт рецепты с любым тегом, all — со всеми."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        breakfast, lunch, dinner = [
+            Tag.objects.create(name=slug, color=f"#00000{index}", slug=slug)
+            for index, slug in enumerate(("breakfast", "lunch", "dinner"))
+        ]
+        cls.recipes = []
+        for index, tags in enumerate(
+            ([breakfast], [breakfast, lunch], [lunch, dinner], [])
+        ):
+            recipe = create_recipe(author, f"Рецепт {index}")
+            recipe.tags.set(tags)
+            cls.recipes.append(recipe)
+
+    def get_ids(self, query):
+        response = self.client.get(f"/api/recipes/?limit=10&{query}")
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe["id"] for recipe in response.json()["results"]]
+        self.assertEqual(response.json()["count"], len(ids))
+        return ids
+
+    def expected(self, *indexes):
+        return [self.recipes[index].pk for index in sorted(indexes)][::-1]
+
+    def test_any_is_default(self):
+        for query in ("", "&tags_mode=any"):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.get_ids(f"tags=breakfast&tags=lunch{query}"),
+                    self.expected(0, 1, 2),
+                )
+
+    def test_all(self):
+        self.assertEqual(
+            self.get_ids("tags=breakfast&tags=lunch&tags_mode=all"),
+            self.expected(1),
+        )
+        self.assertEqual(
+            self.get_ids("tags=lunch&tags_mode=all"), self.expected(1, 2)
+        )
+
+    def test_unknown_mode(self):
+        response = self.client.get("/api/recipes/?tags=lunch&tags_mode=none")
+        self.assertEqual(response.status_code, 400)
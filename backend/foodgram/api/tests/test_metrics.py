@@ -0,0 +1,19 @@
+from django.test import TestCase, override_settings
+
+
+class ServerTimingTest(TestCase):
+    """Server-Timing отдаётся только тем, кому он разрешён."""
+
+    def test_hidden_by_default(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/tags/"))
+
+    @override_settings(METRICS_SERVER_TIMING=True)
+    def test_enabled_by_setting(self):
+        self.assertIn("Server-Timing", self.client.get("/api/tags/"))
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        response = self.client.get("/api/tags/", HTTP_X_METRICS_TOKEN="wrong")
+        self.assertNotIn("Server-Timing", response)
+        response = self.client.get("/api/tags/", HTTP_X_METRICS_TOKEN="secret")
+        self.assertIn("Server-Timing", response)
@@ -0,0 +1,119 @@
+from base64 import urlsafe_b64encode
+from urllib.parse import quote, urlencode
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.fulltext import FTS_TABLE, update_search_index
+from api.models import Recipe
+from api.paginator import plain_count
+from api.tests.fixtures import create_recipe, create_user
+from api.views import RecipesViewSet
+from users.models import User
+
+
+class KeysetPaginationTest(TestCase):
+    """Курсор по (оценка, pk) проходит равные оценки без пропусков."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        for index in range(23):
+            create_recipe(
+                author,
+                f"Рецепт {index}",
+                # Почти все рецепты с одинаковой популярностью.
+                popularity=index if index % 7 == 0 else 1.5,
+            )
+        cls.expected = list(
+            Recipe.objects.order_by("-popularity", "-pk").values_list(
+                "pk", flat=True
+            )
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.addCleanup(setattr, RecipesViewSet, "fast_read", True)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([recipe["id"] for recipe in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    def check_ordering(self):
+        pages = self.walk(
+            "/api/recipes/?pagination=cursor&ordering=popular&limit=4", "next"
+        )
+        self.assertEqual(sum(pages, []), self.expected)
+        response = self.client.get(
+            "/api/recipes/?pagination=cursor&ordering=popular&limit=4"
+        )
+        url = response.data["next"]
+        for _ in range(len(pages) - 2):
+            url = self.client.get(url).data["next"]
+        backwards = self.walk(url, "previous")
+        self.assertEqual(backwards[::-1], pages)
+
+    def test_ties_fast_read(self):
+        self.check_ordering()
+
+    def test_ties_serializer(self):
+        RecipesViewSet.fast_read = False
+        self.check_ordering()
+
+    def test_search_ties(self):
+        update_search_index()
+        pages = self.walk(
+            "/api/recipes/?pagination=cursor&limit=4&search="
+            + quote("рецепт"),
+            "next",
+        )
+        ids = sum(pages, [])
+        self.assertEqual(sorted(ids, reverse=True), ids)
+        self.assertEqual(len(ids), Recipe.objects.count())
+
+    def test_search_count_after_delete(self):
+        update_search_index()
+        path = "/api/recipes/?limit=4&search=" + quote("рецепт")
+        Recipe.objects.first().delete()
+        response = self.client.get(path)
+        self.assertEqual(response.data["count"], len(self.expected) - 1)
+
+    def test_delete_removes_fts_row(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("документы PostgreSQL хранятся в строке рецепта")
+        update_search_index()
+        recipe = Recipe.objects.first()
+        recipe.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE rowid = %s",
+                [recipe.pk],
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_plain_count_skips_annotations(self):
+        user = User.objects.get()
+        queryset = Recipe.objects.with_related(user)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(plain_count(queryset), len(self.expected))
+        self.assertNotIn("EXISTS", context.captured_queries[0]["sql"])
+
+    def test_invalid_cursor(self):
+        positions = ("1.5", '["abc"]', "[null]", '[{"a": 1}]', "[true]")
+        positions += ("[NaN]", f"[{2 ** 64}]", "[1, 2]")
+        for position in positions:
+            cursor = urlsafe_b64encode(
+                urlencode({"p": position}).encode()
+            ).decode()
+            with self.subTest(position=position):
+                response = self.client.get(
+                    f"/api/recipes/?cursor={quote(cursor)}"
+                )
+                self.assertEqual(response.status_code, 404)
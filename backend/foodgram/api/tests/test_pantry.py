@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import IngredientInRecipe
+from api.search import RecipeIngredientIndex, recipe_ingredient_index
+from api.tests.fixtures import (create_ingredients, create_recipe, create_user,
+                                shared_cache)
+
+
+@shared_cache
+class PantryTest(TestCase):
+    """Подбор по ингредиентам на общем кэше и только постранично."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        cls.ingredients = create_ingredients(4)
+        cls.recipes = [
+            create_recipe(
+                author, f"Рецепт {index}", {cls.ingredients[index % 2]: 1}
+            )
+            for index in range(6)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        recipe_ingredient_index.built_at = None
+
+    def test_cursor_parameters_are_ignored(self):
+        include = self.ingredients[0].pk
+        for query in ("pagination=cursor", "cursor=abc"):
+            response = self.client.get(
+                f"/api/recipes/pantry/?include={include}&limit=2&{query}"
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["count"], 3)
+            self.assertEqual(len(response.data["results"]), 2)
+
+    def test_changes_reach_other_processes(self):
+        other = RecipeIngredientIndex()
+        ingredient = self.ingredients[3]
+        self.assertEqual(other.match([ingredient.pk]), [])
+        recipe = self.recipes[0]
+        IngredientInRecipe.objects.filter(recipe=recipe).update(
+            ingredient=ingredient
+        )
+        RecipeIngredientIndex.record_change([recipe.pk])
+        self.assertEqual(other.match([ingredient.pk]), [(recipe.pk, 0)])
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        },
+        INGREDIENT_INDEX_TTL=0,
+    )
+    def test_per_process_cache_uses_ttl(self):
+        ingredient = self.ingredients[3]
+        path = f"/api/recipes/pantry/?include={ingredient.pk}"
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 0)
+        recipe = self.recipes[0]
+        # Изменение без записи в журнал, как в другом воркере.
+        IngredientInRecipe.objects.filter(recipe=recipe).update(
+            ingredient=ingredient
+        )
+        response = self.client.get(path)
+        self.assertEqual(response.data["results"][0]["id"], recipe.pk)
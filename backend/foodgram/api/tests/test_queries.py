@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Favorite, Recipe, ShoppingCart, Tag
+from api.tests.fixtures import (create_ingredients, create_recipe, create_user,
+                                token_client)
+from api.views import RecipesViewSet
+from users.models import Subscription
+
+
+class RecipeListQueriesTest(TestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    recipes = 120
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [
+            create_user(
+                f"author{index}", first_name="Имя", last_name="Фамилия"
+            )
+            for index in range(4)
+        ]
+        cls.user = authors[0]
+        Subscription.objects.create(user=cls.user, author=authors[1])
+        tags = [
+            Tag.objects.create(
+                name=f"Тег {index}", color=f"#00000{index}", slug=f"tag{index}"
+            )
+            for index in range(3)
+        ]
+        ingredients = create_ingredients(20)
+        for index in range(cls.recipes):
+            recipe = create_recipe(
+                authors[index % len(authors)],
+                f"Рецепт {index}",
+                {
+                    ingredients[(index + shift) % 20]: shift + 1
+                    for shift in range(3)
+                },
+            )
+            recipe.tags.set(tags[: 1 + index % len(tags)])
+            if index % 3 == 0:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if index % 5 == 0:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        self.client = token_client(self.user)
+        self.addCleanup(setattr, RecipesViewSet, "fast_read", True)
+
+    def count_queries(self, path):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_list_queries_do_not_depend_on_page_size(self):
+        for fast_read in (True, False):
+            with self.subTest(fast_read=fast_read):
+                RecipesViewSet.fast_read = fast_read
+                self.count_queries("/api/recipes/?limit=1")
+                small, response = self.count_queries("/api/recipes/?limit=5")
+                self.assertEqual(len(response.data["results"]), 5)
+                large, response = self.count_queries(
+                    "/api/recipes/?limit=100"
+                )
+                self.assertEqual(len(response.data["results"]), 100)
+                self.assertEqual(small, large)
+
+    # Токен на локальном кэше тестов проверяется по базе: это первый запрос.
+    def test_list_query_count(self):
+        self.count_queries("/api/recipes/?limit=1")
+        for limit in (5, 100):
+            with self.subTest(limit=limit), self.assertNumQueries(6):
+                self.client.get(f"/api/recipes/?limit={limit}")
+
+    def test_detail_query_count(self):
+        recipe = Recipe.objects.first()
+        self.count_queries(f"/api/recipes/{recipe.pk}/")
+        with self.assertNumQueries(5):
+            self.client.get(f"/api/recipes/{recipe.pk}/")
@@ -0,0 +1,120 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.models import (IngredientInRecipe, Recipe, ShoppingCart,
+                        ShoppingCartItem, Tag)
+from api.serializers import RecordRecipeSerializer
+from api.tests.fixtures import (create_ingredients, create_recipe, create_user,
+                                token_client)
+
+
+class RecipeUpdateTest(TestCase):
+    """Изменение рецепта трогает только отличающиеся строки и столбцы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user("author")
+        cls.ingredients = create_ingredients(4)
+        first, second, third, _ = cls.ingredients
+        cls.recipe = create_recipe(
+            cls.author, "Рецепт", {first: 1, second: 2, third: 3}
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f"Тег {index}", color=f"#00000{index}", slug=f"tag{index}"
+            )
+            for index in range(3)
+        ]
+        cls.recipe.tags.set(cls.tags[:2])
+
+    def setUp(self):
+        self.client = token_client(self.author)
+        self.path = f"/api/recipes/{self.recipe.pk}/"
+
+    def rows(self):
+        return {
+            row.ingredient_id: (row.pk, row.amount)
+            for row in IngredientInRecipe.objects.filter(recipe=self.recipe)
+        }
+
+    def tag_rows(self):
+        return dict(
+            Recipe.tags.through.objects.filter(recipe=self.recipe).values_list(
+                "tag_id", "pk"
+            )
+        )
+
+    def patch(self, data):
+        response = self.client.patch(self.path, data, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_ingredient_rows_are_diffed(self):
+        first, second, third, fourth = self.ingredients
+        before = self.rows()
+        self.patch(
+            {
+                "ingredients": [
+                    {"id": first.pk, "amount": 1},
+                    {"id": second.pk, "amount": 5},
+                    {"id": fourth.pk, "amount": 4},
+                ]
+            }
+        )
+        after = self.rows()
+        self.assertEqual(after.keys(), {first.pk, second.pk, fourth.pk})
+        self.assertEqual(after[first.pk], before[first.pk])
+        self.assertEqual(after[second.pk], (before[second.pk][0], 5))
+        self.assertEqual(after[fourth.pk][1], 4)
+
+    def test_tag_rows_are_diffed(self):
+        first, second, third = self.tags
+        before = self.tag_rows()
+        self.patch({"tags": [second.pk, third.pk]})
+        after = self.tag_rows()
+        self.assertEqual(after.keys(), {second.pk, third.pk})
+        self.assertEqual(after[second.pk], before[second.pk])
+
+    def test_patch_without_relations(self):
+        rows, tag_rows = self.rows(), self.tag_rows()
+        self.patch({"name": "Новое имя"})
+        self.assertEqual(self.rows(), rows)
+        self.assertEqual(self.tag_rows(), tag_rows)
+
+    def test_shopping_cart_follows_amounts(self):
+        first, second, third, fourth = self.ingredients
+        buyer = create_user("buyer")
+        ShoppingCart.objects.create(user=buyer, recipe=self.recipe)
+        self.patch(
+            {
+                "ingredients": [
+                    {"id": second.pk, "amount": 7},
+                    {"id": fourth.pk, "amount": 4},
+                ]
+            }
+        )
+        totals = dict(
+            ShoppingCartItem.objects.filter(user=buyer).values_list(
+                "ingredient_id", "total_amount"
+            )
+        )
+        self.assertEqual(totals, {second.pk: 7, fourth.pk: 4})
+        call_command("rebuild_shopping_cart", "--check", stdout=StringIO())
+
+    def test_concurrent_counters_survive_update(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            favorites_count=5, popularity=2.5, has_image_variants=True
+        )
+        serializer = RecordRecipeSerializer(
+            recipe, data={"name": "Новое имя"}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, "Новое имя")
+        self.assertEqual(recipe.favorites_count, 5)
+        self.assertEqual(recipe.popularity, 2.5)
+        self.assertTrue(recipe.has_image_variants)
@@ -0,0 +1,155 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.fields.files import FieldFile
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.models import IngredientInRecipe, ShoppingCart, ShoppingCartItem, Tag
+from api.tests.fixtures import (create_ingredients, create_recipe, create_user,
+                                token_client)
+
+
+class ShoppingCartItemsTest(TestCase):
+    """Агрегат списка покупок совпадает с корзинами при любых удалениях."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = create_user("user"), create_user("other")
+        cls.ingredients = create_ingredients(3)
+        cls.recipes = [
+            create_recipe(
+                cls.other,
+                f"Рецепт {index}",
+                dict.fromkeys(cls.ingredients[: index + 1], index + 1),
+            )
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.client = token_client(self.user)
+
+    def totals(self, user):
+        return dict(
+            ShoppingCartItem.objects.filter(user=user).values_list(
+                "ingredient_id", "total_amount"
+            )
+        )
+
+    def assert_consistent(self):
+        call_command("rebuild_shopping_cart", "--check", stdout=StringIO())
+
+    def test_api_add_and_remove(self):
+        for recipe in self.recipes:
+            response = self.client.post(
+                f"/api/recipes/{recipe.pk}/shopping_cart/"
+            )
+            self.assertEqual(response.status_code, 201)
+        first, second, third = self.ingredients
+        self.assertEqual(
+            self.totals(self.user), {first.pk: 6, second.pk: 5, third.pk: 3}
+        )
+        response = self.client.delete(
+            f"/api/recipes/{self.recipes[2].pk}/shopping_cart/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.totals(self.user), {first.pk: 3, second.pk: 2})
+        self.assert_consistent()
+
+    def test_bulk_add_and_remove(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        response = self.client.post(
+            "/api/recipes/shopping_cart/", {"recipes": ids}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assert_consistent()
+        response = self.client.delete(
+            "/api/recipes/shopping_cart/", {"recipes": ids[:2]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_consistent()
+        self.assertEqual(len(self.totals(self.user)), 3)
+
+    def test_bulk_queries_do_not_depend_on_size(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        counts = []
+        for size in (1, 3):
+            for method in (self.client.post, self.client.delete):
+                with CaptureQueriesContext(connection) as context:
+                    method(
+                        "/api/recipes/shopping_cart/",
+                        {"recipes": ids[:size]},
+                        format="json",
+                    )
+                counts.append(len(context.captured_queries))
+        self.assertEqual(counts[:2], counts[2:])
+        self.assert_consistent()
+
+    def admin_form_data(self, response):
+        """Данные формы изменения в админке в том виде, как их показали."""
+        forms = [response.context["adminform"].form]
+        data = {}
+        for inline in response.context["inline_admin_formsets"]:
+            management = inline.formset.management_form
+            data.update(
+                (management.add_prefix(name), value)
+                for name, value in management.initial.items()
+            )
+            forms.extend(inline.formset.forms)
+        for form in forms:
+            for name in form.fields:
+                value = form[name].value()
+                if value is not None and not isinstance(value, FieldFile):
+                    data[form.add_prefix(name)] = value
+        return data
+
+    def test_admin_ingredient_edit(self):
+        recipe = self.recipes[2]
+        recipe.tags.add(
+            Tag.objects.create(name="Обед", color="#000000", slug="lunch")
+        )
+        for user in (self.user, self.other):
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+        admin = create_user("admin", is_staff=True, is_superuser=True)
+        self.client.force_login(admin)
+        url = f"/admin/api/recipe/{recipe.pk}/change/"
+        data = self.admin_form_data(self.client.get(url))
+        rows = list(IngredientInRecipe.objects.filter(recipe=recipe))
+        prefix = "recipe_ingredients"
+        for index, row in enumerate(rows):
+            self.assertEqual(data[f"{prefix}-{index}-id"], row.pk)
+        data[f"{prefix}-0-amount"] = 10
+        data[f"{prefix}-1-DELETE"] = "on"
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assert_consistent()
+        first = self.ingredients[0]
+        self.assertEqual(self.totals(self.user)[first.pk], 10)
+
+    def test_admin_delete(self):
+        for recipe in self.recipes:
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.filter(recipe=self.recipes[0]).delete()
+        self.assert_consistent()
+
+    def test_cascades(self):
+        for user in (self.user, self.other):
+            for recipe in self.recipes:
+                ShoppingCart.objects.create(user=user, recipe=recipe)
+        self.recipes[1].delete()
+        self.assert_consistent()
+        self.ingredients[0].delete()
+        self.assert_consistent()
+        self.other.delete()
+        self.assert_consistent()
+        self.assertFalse(ShoppingCartItem.objects.exclude(user=self.user))
+
+    def test_apply_deltas_existing_rows(self):
+        ingredient = self.ingredients[0]
+        for _ in range(2):
+            ShoppingCartItem.objects.apply_deltas(
+                [self.user.pk, self.other.pk], {ingredient.pk: 2}
+            )
+        self.assertEqual(self.totals(self.user), {ingredient.pk: 4})
+        self.assertEqual(self.totals(self.other), {ingredient.pk: 4})
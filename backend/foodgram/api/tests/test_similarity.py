@@ -0,0 +1,43 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import RecipeBucket, RecipeSignature
+from api.similarity import similar_recipes, update_signatures
+from api.tests.fixtures import create_ingredients, create_recipe, create_user
+
+
+class SimilarRecipesTest(TestCase):
+    """Похожие рецепты читаются из готовых подписей и корзин."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        ingredients = create_ingredients(12)
+        compositions = (
+            ingredients[:6],
+            ingredients[:6],
+            ingredients[:3] + ingredients[6:9],
+            ingredients[9:],
+        )
+        cls.recipes = [
+            create_recipe(
+                author, f"Рецепт {index}", dict.fromkeys(composition, 1)
+            )
+            for index, composition in enumerate(compositions)
+        ]
+
+    def test_missing_signature_is_not_written_on_read(self):
+        RecipeSignature.objects.all().delete()
+        RecipeBucket.objects.all().delete()
+        response = APIClient().get(
+            f"/api/recipes/{self.recipes[0].pk}/similar/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+        self.assertFalse(RecipeSignature.objects.exists())
+
+    @override_settings(SIMILAR_RECIPES_CANDIDATES=1)
+    def test_candidates_ranked_by_shared_buckets(self):
+        update_signatures([recipe.pk for recipe in self.recipes])
+        first, twin = self.recipes[:2]
+        self.assertEqual(similar_recipes(first.pk, 5), [(twin.pk, 1.0)])
@@ -0,0 +1,90 @@
+from django.test import TestCase
+
+from api.models import Tag
+from api.tests.fixtures import (create_ingredients, create_recipe, create_user,
+                                token_client)
+from api.views import RecipesViewSet
+from users.models import Subscription
+
+
+class SparseFieldsTest(TestCase):
+    """?fields= отбирает поля, а нераскрытые связи сворачивает в id."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("user")
+        cls.author = create_user("author")
+        ingredients = create_ingredients(2)
+        cls.tag = Tag.objects.create(
+            name="Обед", color="#000000", slug="lunch"
+        )
+        cls.recipe = create_recipe(
+            cls.author, "Рецепт", dict.fromkeys(ingredients, 2)
+        )
+        cls.recipe.tags.set([cls.tag])
+        cls.ingredient_ids = [ingredient.pk for ingredient in ingredients]
+        Subscription.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.client = token_client(self.user)
+        self.addCleanup(setattr, RecipesViewSet, "fast_read", True)
+
+    def get_recipes(self, query):
+        """Первый рецепт списка и детальный ответ для обоих путей чтения."""
+        results = []
+        for fast_read in (True, False):
+            RecipesViewSet.fast_read = fast_read
+            response = self.client.get(f"/api/recipes/?{query}")
+            self.assertEqual(response.status_code, 200)
+            results.append(response.json()["results"][0])
+        response = self.client.get(f"/api/recipes/{self.recipe.pk}/?{query}")
+        self.assertEqual(response.status_code, 200)
+        results.append(response.json())
+        return results
+
+    def test_fields_prune_response(self):
+        for recipe in self.get_recipes("fields=id,name"):
+            self.assertEqual(recipe, {"id": self.recipe.pk, "name": "Рецепт"})
+
+    def test_relations_collapse_to_ids(self):
+        for recipe in self.get_recipes("fields=id,tags,author,ingredients"):
+            self.assertEqual(
+                recipe,
+                {
+                    "id": self.recipe.pk,
+                    "tags": [self.tag.pk],
+                    "author": self.author.pk,
+                    "ingredients": self.ingredient_ids,
+                },
+            )
+
+    def test_expand_and_nested_fields(self):
+        query = "fields=id,tags,author.username&expand=tags"
+        for recipe in self.get_recipes(query):
+            self.assertEqual(recipe["author"], {"username": "author"})
+            self.assertEqual(
+                recipe["tags"],
+                [
+                    {
+                        "id": self.tag.pk,
+                        "name": "Обед",
+                        "color": "#000000",
+                        "slug": "lunch",
+                    }
+                ],
+            )
+
+    def test_no_fields_keeps_full_response(self):
+        for recipe in self.get_recipes(""):
+            self.assertEqual(recipe["author"]["id"], self.author.pk)
+            self.assertIn("is_subscribed", recipe["author"])
+            self.assertEqual(recipe["ingredients"][0]["amount"], 2)
+
+    def test_subscriptions(self):
+        response = self.client.get(
+            "/api/users/subscriptions/?fields=id,recipes"
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"id": self.author.pk, "recipes": [self.recipe.pk]}],
+        )
@@ -1,28 +1,43 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from .filters import IngredientFilter, RecipeFilter
-from .models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
-                     ShoppingCart, Tag)
-from .paginator import VariablePageSizePaginator
+from .caching import CachedCatalogueMixin
+from .counters import RECIPE_COUNTERS, change_counter, delete_rows
+from .filters import RECIPE_ORDERINGS, IngredientFilter, RecipeFilter
+from .models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                     ShoppingCartItem, Tag)
+from .paginator import (KeysetPaginator, PageNumberOnlyPaginator,
+                        VariablePageSizePaginator)
 from .permissions import OwnerOrAdminOrSafeMethods
+from .readers import build_recipes, recipe_values
+from .renderers import (ShoppingCartCSVRenderer, ShoppingCartPDFRenderer,
+                        ShoppingCartTextRenderer, TimedORJSONRenderer)
+from .search import (ingredient_index, recipe_ingredient_index,
+                     recipe_ingredients_changed)
 from .serializers import (FavoriteSerializer, IngredientSerializer,
+                          PantrySearchSerializer, RecipeIdsSerializer,
                           RecordRecipeSerializer, ShoppingCartSerializer,
                           ShowRecipeSerializer, TagSerializer)
+from .signals import batched_cart_changes
+from .similarity import similar_recipes
+from .sparse import FieldSpec
+from users.models import Subscription, User
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(CachedCatalogueMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all().order_by("id")
     serializer_class = TagSerializer
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedCatalogueMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [AllowAny]
@@ -32,6 +47,14 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     ]
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            lambda: Response(
+                ingredient_index.search(request.query_params.get("name", ""))
+            ),
+        )
+
 
 class RecipesViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all().order_by("-id")
@@ -39,29 +62,148 @@ class RecipesViewSet(viewsets.ModelViewSet):
     pagination_class = VariablePageSizePaginator
     filter_backends = (DjangoFilterBackend,)
     filter_class = RecipeFilter
+    renderer_classes = (TimedORJSONRenderer, BrowsableAPIRenderer)
+    # Списки собираются из .values() функциями api.readers, а не
+    # ShowRecipeSerializer; JSON при этом тот же.
+    fast_read = True
+
+    def get_queryset(self):
+        if self.action in ("list", "feed"):
+            params = self.request.query_params
+            self.cursor_ordering = RECIPE_ORDERINGS.get(
+                params.get("ordering"),
+                ("-search_rank", "-pk") if params.get("search") else "-pk",
+            )
+        if self.action in (
+            "list",
+            "retrieve",
+            "feed",
+            "pantry",
+            "similar",
+        ):
+            return self.queryset.with_related(
+                self.request.user, FieldSpec.from_request(self.request)
+            )
+        return self.queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ("list", "feed", "pantry", "similar"):
+            context["image_variant"] = "medium"
+        return context
 
     def get_serializer_class(self):
         if self.request.method == "GET":
             return ShowRecipeSerializer
         return RecordRecipeSerializer
 
+    def paginated_recipes(self, queryset, paginator):
+        if not self.fast_read:
+            page = paginator.paginate_queryset(queryset, self.request, self)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        ordering = self.cursor_ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        spec = FieldSpec.from_request(self.request)
+        page = paginator.paginate_queryset(
+            recipe_values(
+                queryset, [field.lstrip("-") for field in ordering], spec
+            ),
+            self.request,
+            self,
+        )
+        return paginator.get_paginated_response(
+            build_recipes(
+                page,
+                self.request,
+                self.get_serializer_context().get("image_variant"),
+                spec,
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.paginated_recipes(
+            self.filter_queryset(self.get_queryset()), self.paginator
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        recipe_ingredients_changed([instance.pk])
+        change_counter(
+            User.objects.filter(pk=instance.author_id),
+            "recipes_count",
+            -delete_rows(Recipe.objects.filter(pk=instance.pk)),
+        )
+
     @staticmethod
+    @transaction.atomic
     def post_or_delete(request, model, serializer, pk):
         if request.method != "POST":
-            get_object_or_404(
-                model,
-                user=request.user,
-                recipe=get_object_or_404(Recipe, id=pk),
-            ).delete()
+            recipe = get_object_or_404(Recipe, id=pk)
+            if not delete_rows(
+                model.objects.filter(user=request.user, recipe=recipe)
+            ):
+                raise Http404
+            change_counter(
+                Recipe.objects.filter(pk=recipe.pk), RECIPE_COUNTERS[model], -1
+            )
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = serializer(
             data={"user": request.user.id, "recipe": pk},
             context={"request": request},
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        instance = serializer.save()
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[model],
+            1,
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @staticmethod
+    @transaction.atomic
+    def bulk_post_or_delete(request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["recipes"]
+        # Блокировка пользователя выстраивает его массовые запросы в очередь:
+        # прочитанные строки не меняются до конца транзакции, и счётчики
+        # сдвигаются ровно на вставленные или удалённые строки.
+        User.objects.select_for_update().get(pk=request.user.pk)
+        rows = model.objects.filter(user=request.user, recipe__in=recipe_ids)
+        existing = set(rows.values_list("recipe_id", flat=True))
+        counter = RECIPE_COUNTERS[model]
+        if request.method != "POST":
+            with batched_cart_changes():
+                rows.delete()
+            if model is ShoppingCart:
+                ShoppingCartItem.objects.remove_recipes(
+                    [request.user.pk], existing
+                )
+            change_counter(Recipe.objects.filter(pk__in=existing), counter, -1)
+            return Response(
+                {
+                    "removed": sorted(existing),
+                    "missing": [
+                        pk for pk in recipe_ids if pk not in existing
+                    ],
+                }
+            )
+        added = [pk for pk in dict.fromkeys(recipe_ids) if pk not in existing]
+        model.objects.bulk_create(
+            [model(user=request.user, recipe_id=pk) for pk in added],
+            ignore_conflicts=True,
+        )
+        if model is ShoppingCart:
+            ShoppingCartItem.objects.add_recipes([request.user.pk], added)
+        change_counter(Recipe.objects.filter(pk__in=added), counter, 1)
+        return Response(
+            {"added": added, "existing": sorted(existing)},
+            status=status.HTTP_201_CREATED,
+        )
+
     @action(
         detail=True,
         methods=["POST", "DELETE"],
@@ -80,26 +222,105 @@ class RecipesViewSet(viewsets.ModelViewSet):
             request, ShoppingCart, ShoppingCartSerializer, pk
         )
 
+    @action(
+        detail=False,
+        methods=["POST", "DELETE"],
+        permission_classes=(IsAuthenticated,),
+        url_path="favorite",
+        url_name="favorite-bulk",
+    )
+    def favorite_bulk(self, request):
+        return self.bulk_post_or_delete(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=["POST", "DELETE"],
+        permission_classes=(IsAuthenticated,),
+        url_path="shopping_cart",
+        url_name="shopping-cart-bulk",
+    )
+    def shopping_cart_bulk(self, request):
+        return self.bulk_post_or_delete(request, ShoppingCart)
+
     @action(
         detail=False, methods=["GET"], permission_classes=(IsAuthenticated,)
     )
+    def feed(self, request):
+        return self.paginated_recipes(
+            self.filter_queryset(self.get_queryset()).filter(
+                author__in=Subscription.objects.filter(
+                    user=request.user
+                ).values("author")
+            ),
+            KeysetPaginator(),
+        )
+
+    @action(detail=True, methods=["GET"])
+    def similar(self, request, pk):
+        """Рецепты с самыми похожими наборами ингредиентов и тегов."""
+        recipe = get_object_or_404(Recipe, pk=pk)
+        try:
+            limit = min(int(request.query_params.get("limit", 6)), 30)
+        except ValueError:
+            limit = 6
+        scores = dict(similar_recipes(recipe.pk, max(limit, 1)))
+        recipes = self.get_queryset().in_bulk(scores)
+        found = [recipes[pk] for pk in scores if pk in recipes]
+        data = self.get_serializer(found, many=True).data
+        for recipe, item in zip(found, data):
+            item["similarity"] = round(scores[recipe.pk], 3)
+        return Response(data)
+
+    @action(detail=False, methods=["GET"])
+    def pantry(self, request):
+        """Рецепты из имеющихся ингредиентов.
+
+        include — имеющиеся ингредиенты, exclude — недопустимые, missing —
+        сколько ингредиентов рецепта может не хватать. Сначала идут рецепты,
+        которым не хватает меньше всего.
+        """
+        serializer = PantrySearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        matches = recipe_ingredient_index.match(**serializer.validated_data)
+        paginator = PageNumberOnlyPaginator()
+        page = paginator.paginate_queryset(matches, request, self)
+        missing = dict(page)
+        recipes = self.get_queryset().in_bulk(missing)
+        found = [recipes[pk] for pk in missing if pk in recipes]
+        data = self.get_serializer(found, many=True).data
+        for recipe, item in zip(found, data):
+            item["missing_ingredients"] = missing[recipe.pk]
+        return paginator.get_paginated_response(data)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingCartTextRenderer,
+            ShoppingCartCSVRenderer,
+            ShoppingCartPDFRenderer,
+        ),
+    )
     def download_shopping_cart(self, request, pk=None):
         ingredients = (
-            IngredientInRecipe.objects.filter(
-                recipe__recipe_shopping_cart__user=request.user.id
+            ShoppingCartItem.objects.filter(user=request.user)
+            .values(
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                amount=F("total_amount"),
             )
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(amount=Sum("amount"))
+            .order_by("ingredient__name")
+        )
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator()),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = (
+            f"attachment;filename=shopping_cart.{renderer.extension}"
         )
-        shopping_cart = ["Список покупок:\n---"]
-        for position, ingredient in enumerate(ingredients, start=1):
-            shopping_cart.append(
-                f'\n{position}. {ingredient["ingredient__name"]}:'
-                f' {ingredient["amount"]}'
-                f'({ingredient["ingredient__measurement_unit"]})'
-            )
-        response = HttpResponse(shopping_cart, content_type="text")
-        response[
-            "Content-Disposition"
-        ] = "attachment;filename=shopping_cart.pdf"
         return response
@@ -0,0 +1,228 @@
+import random
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from PIL import Image
+
+from api.bulk import bulk_create
+from api.models import (Favorite, Ingredient, IngredientInRecipe, Recipe,
+                        ShoppingCart, Tag)
+from users.models import Subscription, User
+
+USERNAME_PREFIX = "bench_"
+PASSWORD = "benchmark-password"
+IMAGE_NAME = "api/images/benchmark.png"
+TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+)
+
+
+def benchmark_users():
+    return User.objects.filter(username__startswith=USERNAME_PREFIX)
+
+
+def clear():
+    benchmark_users().delete()
+
+
+def ensure_image():
+    if not default_storage.exists(IMAGE_NAME):
+        buffer = BytesIO()
+        Image.new("RGB", (1200, 800), "#E26C2D").save(buffer, "PNG")
+        default_storage.save(IMAGE_NAME, ContentFile(buffer.getvalue()))
+    return IMAGE_NAME
+
+
+def ensure_tags():
+    for name, color, slug in TAGS:
+        Tag.objects.get_or_create(
+            slug=slug, defaults={"name": name, "color": color}
+        )
+    return list(Tag.objects.values_list("pk", flat=True))
+
+
+def ensure_ingredients(count):
+    existing = list(Ingredient.objects.values_list("pk", flat=True))
+    if len(existing) >= count:
+        return existing
+    Ingredient.objects.bulk_create(
+        [
+            Ingredient(name=f"bench ingredient {index}", measurement_unit="г")
+            for index in range(count - len(existing))
+        ],
+        ignore_conflicts=True,
+    )
+    return list(Ingredient.objects.values_list("pk", flat=True))
+
+
+class DataGenerator:
+    """Детерминированно наполняет базу пользователями и рецептами."""
+
+    def __init__(
+        self,
+        users=100,
+        recipes_per_user=10,
+        ingredients_per_recipe=(3, 15),
+        tags_per_recipe=(1, 3),
+        favorites_per_user=20,
+        carts_per_user=5,
+        subscriptions_per_user=10,
+        seed=0,
+        batch_size=2000,
+        stdout=None,
+    ):
+        self.users = users
+        self.recipes_per_user = recipes_per_user
+        self.ingredients_per_recipe = ingredients_per_recipe
+        self.tags_per_recipe = tags_per_recipe
+        self.favorites_per_user = favorites_per_user
+        self.carts_per_user = carts_per_user
+        self.subscriptions_per_user = subscriptions_per_user
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def bulk_create(self, model, objects):
+        bulk_create(model, objects, self.batch_size)
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        self.bulk_create(
+            User,
+            [
+                User(
+                    username=f"{USERNAME_PREFIX}{index}",
+                    email=f"{USERNAME_PREFIX}{index}@example.com",
+                    first_name="Bench",
+                    last_name=str(index),
+                    password=password,
+                )
+                for index in range(self.users)
+            ],
+        )
+        return list(benchmark_users().values_list("pk", flat=True))
+
+    def create_recipes(self, user_ids, image):
+        self.bulk_create(
+            Recipe,
+            [
+                Recipe(
+                    author_id=user_id,
+                    name=f"Рецепт {user_id}-{index}",
+                    text="Описание рецепта для нагрузочного теста. " * 5,
+                    image=image,
+                    cooking_time=self.rng.randint(5, 180),
+                )
+                for user_id in user_ids
+                for index in range(self.recipes_per_user)
+            ],
+        )
+        return list(
+            Recipe.objects.filter(author_id__in=user_ids).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def create_relations(self, recipe_ids, ingredient_ids, tag_ids):
+        tag_links, ingredient_links = [], []
+        for recipe_id in recipe_ids:
+            for tag_id in self.rng.sample(
+                tag_ids,
+                min(len(tag_ids), self.rng.randint(*self.tags_per_recipe)),
+            ):
+                tag_links.append(
+                    Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                )
+            for ingredient_id in self.rng.sample(
+                ingredient_ids,
+                min(
+                    len(ingredient_ids),
+                    self.rng.randint(*self.ingredients_per_recipe),
+                ),
+            ):
+                ingredient_links.append(
+                    IngredientInRecipe(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=self.rng.randint(1, 500),
+                    )
+                )
+        self.bulk_create(Recipe.tags.through, tag_links)
+        self.bulk_create(IngredientInRecipe, ingredient_links)
+
+    def sample_pairs(self, user_ids, targets, per_user, exclude_self=False):
+        pairs = []
+        for user_id in user_ids:
+            choices = self.rng.sample(
+                targets, min(len(targets), per_user + 1)
+            )
+            if exclude_self and user_id in choices:
+                choices.remove(user_id)
+            pairs.extend((user_id, target) for target in choices[:per_user])
+        return pairs
+
+    def create_activity(self, user_ids, recipe_ids):
+        self.bulk_create(
+            Favorite,
+            [
+                Favorite(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in self.sample_pairs(
+                    user_ids, recipe_ids, self.favorites_per_user
+                )
+            ],
+        )
+        self.bulk_create(
+            ShoppingCart,
+            [
+                ShoppingCart(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in self.sample_pairs(
+                    user_ids, recipe_ids, self.carts_per_user
+                )
+            ],
+        )
+        self.bulk_create(
+            Subscription,
+            [
+                Subscription(user_id=user_id, author_id=author_id)
+                for user_id, author_id in self.sample_pairs(
+                    user_ids,
+                    user_ids,
+                    self.subscriptions_per_user,
+                    exclude_self=True,
+                )
+            ],
+        )
+
+    def rebuild_aggregates(self):
+        call_command("rebuild_shopping_cart", stdout=self.stdout)
+        call_command("reconcile_counters", stdout=self.stdout)
+        call_command("rebuild_search_index", stdout=self.stdout)
+        call_command(
+            "rebuild_recipe_signatures", workers=0, stdout=self.stdout
+        )
+
+    @transaction.atomic
+    def generate(self):
+        image = ensure_image()
+        tag_ids = ensure_tags()
+        ingredient_ids = ensure_ingredients(
+            max(self.ingredients_per_recipe) * 4
+        )
+        user_ids = self.create_users()
+        self.log(f"Пользователей: {len(user_ids)}")
+        recipe_ids = self.create_recipes(user_ids, image)
+        self.log(f"Рецептов: {len(recipe_ids)}")
+        self.create_relations(recipe_ids, ingredient_ids, tag_ids)
+        self.create_activity(user_ids, recipe_ids)
+        self.rebuild_aggregates()
+        return user_ids, recipe_ids
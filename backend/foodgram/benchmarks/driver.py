@@ -0,0 +1,269 @@
+import base64
+import json
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.test import Client
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from .data import PASSWORD, benchmark_users
+from api.models import Ingredient, Recipe, Tag
+
+QUERIES_PATTERN = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def parse_queries(server_timing):
+    match = QUERIES_PATTERN.search(server_timing or "")
+    return int(match.group(1)) if match else None
+
+
+class InProcessTransport:
+    """Запросы через django.test.Client в текущем процессе."""
+
+    def __init__(self):
+        self.client = Client()
+
+    def login(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        return token.key
+
+    def request(self, method, path, token, body=None):
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(body) if body is not None else "",
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {token}",
+        )
+        content = (
+            b"".join(response.streaming_content)
+            if response.streaming
+            else response.content
+        )
+        return (
+            response.status_code,
+            response.get("Server-Timing"),
+            content,
+        )
+
+
+class HttpTransport:
+    """Запросы к запущенному серверу (например, локальному gunicorn).
+
+    Server-Timing сервер отдаёт с METRICS_TOKEN в X-Metrics-Token или при
+    включённом у него METRICS_SERVER_TIMING.
+    """
+
+    def __init__(self, base_url, metrics_token=None):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        metrics_token = metrics_token or settings.METRICS_TOKEN
+        if metrics_token:
+            self.session.headers["X-Metrics-Token"] = metrics_token
+
+    def login(self, user):
+        response = self.session.post(
+            f"{self.base_url}/api/auth/token/login/",
+            json={"email": user.email, "password": PASSWORD},
+        )
+        response.raise_for_status()
+        return response.json()["auth_token"]
+
+    def request(self, method, path, token, body=None):
+        response = self.session.request(
+            method,
+            f"{self.base_url}{path}",
+            json=body,
+            headers={"Authorization": f"Token {token}"},
+        )
+        return (
+            response.status_code,
+            response.headers.get("Server-Timing"),
+            response.content,
+        )
+
+
+def small_image():
+    buffer = BytesIO()
+    Image.new("RGB", (640, 480), "#49B64E").save(buffer, "PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/png;base64,{encoded}"
+
+
+class Scenarios:
+    """Набор сценариев: каждый возвращает (метод, путь, тело)."""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.recipe_ids = list(
+            Recipe.objects.filter(author__in=benchmark_users()).values_list(
+                "pk", flat=True
+            )
+        )
+        self.tag_slugs = list(Tag.objects.values_list("slug", flat=True))
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list("pk", flat=True)[:200]
+        )
+        self.tag_ids = list(Tag.objects.values_list("pk", flat=True))
+        self.image = small_image()
+
+    def recipe_list(self):
+        return "GET", "/api/recipes/?limit=6", None
+
+    def recipe_list_cards(self):
+        return (
+            "GET",
+            "/api/recipes/?limit=6&fields=id,name,image,cooking_time",
+            None,
+        )
+
+    def recipe_list_deep(self):
+        page = self.rng.randint(1, max(1, len(self.recipe_ids) // 6))
+        return "GET", f"/api/recipes/?limit=6&page={page}", None
+
+    def recipe_list_tags(self):
+        tags = "&".join(
+            f"tags={slug}"
+            for slug in self.rng.sample(
+                self.tag_slugs, min(2, len(self.tag_slugs))
+            )
+        )
+        return "GET", f"/api/recipes/?limit=6&{tags}", None
+
+    def recipe_list_favorited(self):
+        return "GET", "/api/recipes/?limit=6&is_favorited=1", None
+
+    def recipe_detail(self):
+        return "GET", f"/api/recipes/{self.rng.choice(self.recipe_ids)}/", None
+
+    def recipe_create(self):
+        return (
+            "POST",
+            "/api/recipes/",
+            {
+                "name": "Рецепт из бенчмарка",
+                "text": "Описание",
+                "cooking_time": 30,
+                "image": self.image,
+                "tags": self.rng.sample(self.tag_ids, 1),
+                "ingredients": [
+                    {"id": ingredient_id, "amount": 100}
+                    for ingredient_id in self.rng.sample(
+                        self.ingredient_ids, min(10, len(self.ingredient_ids))
+                    )
+                ],
+            },
+        )
+
+    def recipe_feed(self):
+        return "GET", "/api/recipes/feed/?limit=6", None
+
+    def recipe_pantry(self):
+        include = "&".join(
+            f"include={ingredient_id}"
+            for ingredient_id in self.rng.sample(
+                self.ingredient_ids, min(20, len(self.ingredient_ids))
+            )
+        )
+        return "GET", f"/api/recipes/pantry/?limit=6&missing=2&{include}", None
+
+    def subscriptions(self):
+        return "GET", "/api/users/subscriptions/?limit=6&recipes_limit=3", None
+
+    def download_shopping_cart(self):
+        return "GET", "/api/recipes/download_shopping_cart/", None
+
+    names = (
+        "recipe_list",
+        "recipe_list_cards",
+        "recipe_list_deep",
+        "recipe_list_tags",
+        "recipe_list_favorited",
+        "recipe_detail",
+        "recipe_create",
+        "recipe_feed",
+        "recipe_pantry",
+        "subscriptions",
+        "download_shopping_cart",
+    )
+
+
+class Runner:
+    def __init__(self, transport, requests=100, warmup=5, concurrency=1):
+        self.transport = transport
+        self.requests = requests
+        self.warmup = warmup
+        self.concurrency = concurrency
+        user = benchmark_users().order_by("pk").first()
+        if user is None:
+            raise RuntimeError(
+                "Нет данных для бенчмарка: запустите seed_benchmark_data"
+            )
+        self.token = transport.login(user)
+
+    def call(self, request):
+        method, path, body = request
+        started = time.perf_counter()
+        status, server_timing, content = self.transport.request(
+            method, path, self.token, body
+        )
+        elapsed = time.perf_counter() - started
+        if status >= 400:
+            raise RuntimeError(f"{method} {path}: {status} {content[:200]}")
+        if method == "POST" and path == "/api/recipes/":
+            self.created.append(json.loads(content)["id"])
+        return elapsed, parse_queries(server_timing)
+
+    def run_scenario(self, build):
+        for _ in range(self.warmup):
+            self.call(build())
+        requests = [build() for _ in range(self.requests)]
+        started = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(self.concurrency) as pool:
+                results = list(pool.map(self.call, requests))
+        else:
+            results = [self.call(request) for request in requests]
+        wall = time.perf_counter() - started
+        latencies = [elapsed * 1000 for elapsed, _ in results]
+        queries = [count for _, count in results if count is not None]
+        return {
+            "requests": len(results),
+            "p50_ms": round(percentile(latencies, 0.5), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "throughput_rps": round(len(results) / wall, 2),
+            "queries_per_request": (
+                round(sum(queries) / len(queries), 2) if queries else None
+            ),
+        }
+
+    def cleanup(self):
+        for recipe_id in self.created:
+            self.transport.request(
+                "DELETE", f"/api/recipes/{recipe_id}/", self.token
+            )
+        self.created = []
+
+    def run(self, scenarios, names):
+        self.created = []
+        results = {}
+        try:
+            for name in names:
+                results[name] = self.run_scenario(getattr(scenarios, name))
+        finally:
+            self.cleanup()
+        return results
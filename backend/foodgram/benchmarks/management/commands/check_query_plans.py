@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.data import benchmark_users
+from benchmarks.driver import InProcessTransport, Scenarios
+from benchmarks.plans import check_plans, read_requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет GET-сценарии бенчмарка, снимает EXPLAIN для каждого "
+        "запроса к БД и завершается ошибкой, если большая таблица читается "
+        "последовательно. Нужны данные из seed_benchmark_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Проверять таблицы не меньше этого числа строк",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        user = benchmark_users().order_by("pk").first()
+        if user is None:
+            raise CommandError(
+                "Нет данных для проверки: запустите seed_benchmark_data"
+            )
+        transport = InProcessTransport()
+        requests = read_requests(Scenarios(options["seed"]))
+        problems = check_plans(
+            transport, transport.login(user), requests, options["min_rows"]
+        )
+        for path, scans in problems.items():
+            for table, sql in scans:
+                self.stderr.write(f"{path}: Seq Scan {table}\n  {sql}")
+        if problems:
+            raise CommandError(
+                f"Последовательное чтение в {len(problems)} эндпоинтах"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Проверено эндпоинтов: {len(requests)}, "
+                "последовательных чтений нет"
+            )
+        )
@@ -0,0 +1,116 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.driver import HttpTransport, Runner, Scenarios
+
+DEPLOYMENTS = {
+    "wsgi": ["foodgram.wsgi:application"],
+    "asgi": [
+        "--worker-class",
+        "uvicorn.workers.UvicornWorker",
+        "foodgram.asgi:application",
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Поднимает gunicorn с синхронными воркерами (WSGI) и с воркерами "
+        "uvicorn (ASGI) при одинаковом числе процессов и сравнивает "
+        "задержки и пропускную способность на разных уровнях конкурентности."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=(1, 8, 32)
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--port", type=int, default=8100)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=Scenarios.names,
+            help="Сценарии для сравнения (по умолчанию чтение рецептов)",
+        )
+        parser.add_argument(
+            "--deployment",
+            action="append",
+            choices=DEPLOYMENTS,
+            help="Сравнивать только указанные варианты",
+        )
+        parser.add_argument("--output", help="Файл для результатов JSON")
+
+    def start_server(self, deployment, url, port, workers):
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--workers",
+                str(workers),
+                *DEPLOYMENTS[deployment],
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "METRICS_SERVER_TIMING": "True"},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Сервер {deployment} не запустился")
+            try:
+                requests.get(f"{url}/api/tags/", timeout=5)
+            except requests.RequestException:
+                time.sleep(0.2)
+            else:
+                return server
+        server.terminate()
+        raise CommandError(f"Сервер {deployment} не ответил за 30 с")
+
+    def handle(self, *args, **options):
+        names = options["scenario"] or ("recipe_list", "recipe_detail")
+        results = {}
+        for offset, deployment in enumerate(
+            options["deployment"] or DEPLOYMENTS
+        ):
+            port = options["port"] + offset
+            url = f"http://127.0.0.1:{port}"
+            server = self.start_server(
+                deployment, url, port, options["workers"]
+            )
+            try:
+                results[deployment] = {}
+                for concurrency in options["concurrency"]:
+                    runner = Runner(
+                        HttpTransport(url),
+                        requests=options["requests"],
+                        warmup=options["warmup"],
+                        concurrency=concurrency,
+                    )
+                    results[deployment][concurrency] = runner.run(
+                        Scenarios(), names
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+        report = json.dumps(
+            {"workers": options["workers"], "results": results},
+            ensure_ascii=False,
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(report)
+        self.stdout.write(report)
@@ -0,0 +1,73 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.renderers import ORJSONRenderer
+from api.views import RecipesViewSet
+from benchmarks.data import benchmark_users
+
+READ_PATHS = {
+    "serializer": {"fast_read": False, "renderer_classes": (JSONRenderer,)},
+    "fast": {"fast_read": True, "renderer_classes": (ORJSONRenderer,)},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает чтение списка рецептов через ShowRecipeSerializer и "
+        "JSONRenderer с быстрым путём (api.readers и orjson): проверяет, "
+        "что ответы совпадают побайтно, и замеряет процессорное время на "
+        "100 рецептов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=3)
+
+    def fetch(self, view, user, limit):
+        request = APIRequestFactory().get("/api/recipes/", {"limit": limit})
+        force_authenticate(request, user=user)
+        response = view(request)
+        response.render()
+        if response.status_code != 200:
+            raise CommandError(f"{response.status_code}: {response.content}")
+        return response.content
+
+    def measure(self, view, user, options):
+        for _ in range(options["warmup"]):
+            content = self.fetch(view, user, options["recipes"])
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        for _ in range(options["repeat"]):
+            content = self.fetch(view, user, options["recipes"])
+        cpu = (time.process_time() - cpu_started) / options["repeat"]
+        wall = (time.perf_counter() - started) / options["repeat"]
+        scale = 100 / options["recipes"]
+        return content, {
+            "cpu_ms_per_100": round(cpu * 1000 * scale, 3),
+            "wall_ms_per_100": round(wall * 1000 * scale, 3),
+            "bytes": len(content),
+        }
+
+    def handle(self, *args, **options):
+        user = benchmark_users().order_by("pk").first()
+        if user is None:
+            raise CommandError(
+                "Нет данных для сравнения: запустите seed_benchmark_data"
+            )
+        contents, results = {}, {}
+        for name, initkwargs in READ_PATHS.items():
+            view = RecipesViewSet.as_view({"get": "list"}, **initkwargs)
+            contents[name], results[name] = self.measure(view, user, options)
+        if len(set(contents.values())) != 1:
+            raise CommandError("Ответы путей чтения отличаются")
+        results["speedup"] = round(
+            results["serializer"]["cpu_ms_per_100"]
+            / max(results["fast"]["cpu_ms_per_100"], 0.001),
+            2,
+        )
+        self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
@@ -0,0 +1,86 @@
+import json
+import subprocess
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from benchmarks.driver import (HttpTransport, InProcessTransport, Runner,
+                               Scenarios)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержку (p50/p99), число запросов к БД и пропускную "
+        "способность основных эндпоинтов и выводит результат в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Адрес запущенного сервера; по умолчанию запросы "
+            "выполняются в текущем процессе через тестовый клиент",
+        )
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=Scenarios.names,
+            help="Запустить только указанные сценарии",
+        )
+        parser.add_argument("--output", help="Файл для результатов JSON")
+
+    def handle(self, *args, **options):
+        if not options["url"] and options["concurrency"] > 1:
+            raise CommandError(
+                "--concurrency больше 1 поддерживается только вместе с --url"
+            )
+        transport = (
+            HttpTransport(options["url"])
+            if options["url"]
+            else InProcessTransport()
+        )
+        try:
+            runner = Runner(
+                transport,
+                requests=options["requests"],
+                warmup=options["warmup"],
+                concurrency=options["concurrency"],
+            )
+        except RuntimeError as error:
+            raise CommandError(error)
+        names = options["scenario"] or Scenarios.names
+        with override_settings(METRICS_SERVER_TIMING=True):
+            scenarios = runner.run(Scenarios(options["seed"]), names)
+        results = {
+            "commit": current_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "transport": "http" if options["url"] else "in-process",
+            "config": {
+                key: options[key]
+                for key in ("requests", "warmup", "concurrency", "seed")
+            },
+            "scenarios": scenarios,
+        }
+        report = json.dumps(results, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(report)
+        self.stdout.write(report)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.data import DataGenerator, clear
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт пользователей bench_*, рецепты, избранное, корзины и "
+        "подписки для нагрузочного теста. Прежние данные bench_* удаляются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes-per-user", type=int, default=10)
+        parser.add_argument(
+            "--ingredients-per-recipe", type=int, nargs=2, default=(3, 15)
+        )
+        parser.add_argument("--favorites-per-user", type=int, default=20)
+        parser.add_argument("--carts-per-user", type=int, default=5)
+        parser.add_argument("--subscriptions-per-user", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Только удалить данные бенчмарка",
+        )
+
+    def handle(self, *args, **options):
+        clear()
+        if options["clear"]:
+            self.stdout.write(self.style.SUCCESS("Данные бенчмарка удалены"))
+            return
+        DataGenerator(
+            users=options["users"],
+            recipes_per_user=options["recipes_per_user"],
+            ingredients_per_recipe=tuple(options["ingredients_per_recipe"]),
+            favorites_per_user=options["favorites_per_user"],
+            carts_per_user=options["carts_per_user"],
+            subscriptions_per_user=options["subscriptions_per_user"],
+            seed=options["seed"],
+            stdout=self.stdout,
+        ).generate()
+        self.stdout.write(self.style.SUCCESS("Данные бенчмарка созданы"))
@@ -0,0 +1,116 @@
+import json
+
+from django.db import connection
+
+LARGE_TABLES = (
+    "api_recipe",
+    "api_recipe_tags",
+    "api_ingredientinrecipe",
+    "api_favorite",
+    "api_shoppingcart",
+    "api_shoppingcartitem",
+    "users_subscription",
+    "users_user",
+)
+
+
+class QueryCollector:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith("SELECT"):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def table_sizes(tables):
+    sizes = {}
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT relname, reltuples FROM pg_class WHERE relname IN %s",
+                (tuple(tables),),
+            )
+            sizes.update(cursor.fetchall())
+        else:
+            for table in tables:
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}"
+                )
+                sizes[table] = cursor.fetchone()[0]
+    return sizes
+
+
+def postgresql_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from postgresql_scans(child)
+
+
+def sequential_scans(sql, params):
+    """Таблицы, которые план запроса читает целиком, без индекса."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return set(postgresql_scans(plan[0]["Plan"]))
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        rows = cursor.fetchall()
+    # SQLite показывает обход по rowid (ORDER BY id LIMIT n) как SCAN;
+    # без временного B-дерева для сортировки он останавливается на n
+    # строках, как Index Scan в PostgreSQL.
+    ordered_walk = " LIMIT " in sql and not any(
+        "TEMP B-TREE" in row[-1] for row in rows
+    )
+    scans = set()
+    for row in rows:
+        words = row[-1].split()
+        if words[0] != "SCAN" or "USING" in words:
+            continue
+        if ordered_walk and row[1] == 0:
+            continue
+        scans.add(words[2] if words[1] == "TABLE" else words[1])
+    return scans
+
+
+def capture_queries(transport, token, requests):
+    collector = QueryCollector()
+    captured = {}
+    for method, path, body in requests:
+        collector.queries = []
+        with connection.execute_wrapper(collector):
+            transport.request(method, path, token, body)
+        captured[path] = collector.queries
+    return captured
+
+
+def read_requests(scenarios):
+    """GET-запросы всех сценариев: EXPLAIN снимается только для чтения."""
+    return [
+        request
+        for request in (
+            getattr(scenarios, name)() for name in scenarios.names
+        )
+        if request[0] == "GET"
+    ]
+
+
+def check_plans(transport, token, requests, min_rows):
+    """Возвращает {путь: [(таблица, sql), ...]} с последовательными
+    чтениями таблиц из LARGE_TABLES, где не меньше min_rows строк."""
+    large = {
+        table
+        for table, size in table_sizes(LARGE_TABLES).items()
+        if size >= min_rows
+    }
+    problems = {}
+    queries = capture_queries(transport, token, requests)
+    for path, statements in queries.items():
+        for sql, params in statements:
+            for table in sequential_scans(sql, params) & large:
+                problems.setdefault(path, []).append((table, sql))
+    return problems
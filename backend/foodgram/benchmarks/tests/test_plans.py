@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from benchmarks.data import DataGenerator, benchmark_users
+from benchmarks.driver import InProcessTransport, Scenarios
+from benchmarks.plans import check_plans, read_requests
+
+
+class QueryPlansTest(TestCase):
+    """GET-сценарии бенчмарка не читают большие таблицы целиком."""
+
+    min_rows = 500
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        cls.media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        cls.media.disable()
+
+    @classmethod
+    def setUpTestData(cls):
+        DataGenerator(
+            users=60, recipes_per_user=10, seed=0, stdout=StringIO()
+        ).generate()
+
+    def test_no_sequential_scans(self):
+        user = benchmark_users().order_by("pk").first()
+        transport = InProcessTransport()
+        problems = check_plans(
+            transport,
+            transport.login(user),
+            read_requests(Scenarios(0)),
+            self.min_rows,
+        )
+        self.assertEqual(problems, {})
@@ -0,0 +1,117 @@
+"""ASGI-точка входа для запуска под uvicorn.
+
+Django 2.2 не умеет асинхронных представлений, поэтому приложение
+оборачивается адаптером WSGI -> ASGI: тело запроса дочитывается в цикле
+событий, и только потом представление занимает поток. Чтение справочников
+и рецептов идёт в отдельном пуле ASGI_READ_THREADS, остальные запросы
+(запись, загрузка изображений) — в пуле ASGI_THREADS, так что медленные
+загрузки не отнимают потоки у чтения.
+"""
+import asyncio
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgiInstance
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram.settings")
+
+wsgi_application = get_wsgi_application()
+
+READ_ONLY_PATH = re.compile(r"^/api/(tags|ingredients|recipes)/(\d+/)?$")
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+
+def closing(application):
+    """Вызывает close() у ответа, как требует PEP 3333.
+
+    Адаптер asgiref его не вызывает, а Django по нему отправляет
+    request_finished и закрывает соединения с БД.
+    """
+
+    def wrapper(environ, start_response):
+        response = application(environ, start_response)
+        try:
+            yield from response
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+    return wrapper
+
+
+class PooledWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """Адаптер asgiref, выполняющий WSGI-приложение в заданном пуле.
+
+    Адаптер сам читает тело запроса и вызывает run_wsgi_app; здесь она
+    переопределена, чтобы отправить приложение в свой пул потоков вместо
+    общего пула sync_to_async.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.run_in_thread, body
+        )
+
+    def run_in_thread(self, body):
+        environ = self.build_environ(self.scope, body)
+        for output in self.wsgi_application(environ, self.start_response):
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            self.sync_send(
+                {
+                    "type": "http.response.body",
+                    "body": output,
+                    "more_body": True,
+                }
+            )
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({"type": "http.response.body"})
+
+
+class PooledWsgiToAsgi:
+    def __init__(self, wsgi_application, read_threads, threads):
+        self.wsgi_application = closing(wsgi_application)
+        self.read_executor = ThreadPoolExecutor(
+            read_threads, thread_name_prefix="asgi-read"
+        )
+        self.executor = ThreadPoolExecutor(
+            threads, thread_name_prefix="asgi"
+        )
+
+    def select_executor(self, scope):
+        if scope["method"] in READ_ONLY_METHODS and READ_ONLY_PATH.match(
+            scope["path"]
+        ):
+            return self.read_executor
+        return self.executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    self.read_executor.shutdown(wait=False)
+                    self.executor.shutdown(wait=False)
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        await PooledWsgiToAsgiInstance(
+            self.wsgi_application, self.select_executor(scope)
+        )(scope, receive, send)
+
+
+application = PooledWsgiToAsgi(
+    wsgi_application, settings.ASGI_READ_THREADS, settings.ASGI_THREADS
+)
@@ -0,0 +1,17 @@
+"""Проверка, что кэш общий для всех процессов.
+
+LocMemCache и DummyCache живут внутри одного процесса: сброс версии,
+удаление снимка токена или запись в журнал из команды или другого воркера
+до них не доходят. Поэтому на таком кэше справочники не кэшируются, токены
+проверяются по базе, а индексы в памяти перестраиваются по TTL. Общий
+бэкенд (Redis, memcached, база данных) задаётся CACHE_BACKEND.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PER_PROCESS_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias="default"):
+    return not isinstance(caches[alias], PER_PROCESS_BACKENDS)
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger("foodgram.metrics")
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.duration = 0.0
+        self.size = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+class MetricsRegistry:
+    """Накопленные по представлениям метрики процесса."""
+
+    fields = (
+        "requests",
+        "queries",
+        "db_seconds",
+        "serialize_seconds",
+        "duration_seconds",
+        "response_bytes",
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = defaultdict(lambda: dict.fromkeys(self.fields, 0))
+
+    def record(self, view, method, status, values):
+        with self.lock:
+            totals = self.views[(view, method, status)]
+            totals["requests"] += 1
+            for field, value in values.items():
+                totals[field] += value
+
+    def render(self):
+        lines = []
+        with self.lock:
+            views = {key: dict(totals) for key, totals in self.views.items()}
+        for field in self.fields:
+            name = f"foodgram_view_{field}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (view, method, status), totals in sorted(views.items()):
+                lines.append(
+                    f'{name}{{view="{view}",method="{method}",'
+                    f'status="{status}"}} {totals[field]}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class QueryMetricsMiddleware:
+    """Считает запросы к БД, время БД, сериализации и размер ответа.
+
+    Значения копятся в registry для /metrics и пишутся в лог, если
+    превышены пороги из настроек. Заголовок Server-Timing раскрывает
+    устройство запроса, поэтому добавляется только при DEBUG, включённом
+    METRICS_SERVER_TIMING или с METRICS_TOKEN в заголовке X-Metrics-Token.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.duration = time.perf_counter() - started
+        metrics.size = 0 if response.streaming else len(response.content)
+        if self.server_timing_allowed(request):
+            response["Server-Timing"] = self.server_timing(metrics)
+        match = request.resolver_match
+        registry.record(
+            match.view_name if match else "unresolved",
+            request.method,
+            response.status_code,
+            {
+                "queries": metrics.queries,
+                "db_seconds": metrics.db_time,
+                "serialize_seconds": metrics.serialize_time,
+                "duration_seconds": metrics.duration,
+                "response_bytes": metrics.size,
+            },
+        )
+        if (
+            metrics.duration * 1000 > settings.METRICS_SLOW_REQUEST_MS
+            or metrics.queries > settings.METRICS_SLOW_QUERY_COUNT
+        ):
+            self.log_slow(request, metrics)
+        return response
+
+    @staticmethod
+    def server_timing_allowed(request):
+        token = settings.METRICS_TOKEN
+        return (
+            settings.DEBUG
+            or settings.METRICS_SERVER_TIMING
+            or bool(token)
+            and request.META.get("HTTP_X_METRICS_TOKEN") == token
+        )
+
+    @staticmethod
+    def server_timing(metrics):
+        app_time = metrics.duration - metrics.db_time - metrics.serialize_time
+        return ", ".join(
+            (
+                f"db;dur={metrics.db_time * 1000:.1f};"
+                f'desc="{metrics.queries} queries"',
+                f"serialize;dur={metrics.serialize_time * 1000:.1f}",
+                f"app;dur={app_time * 1000:.1f}",
+                f"total;dur={metrics.duration * 1000:.1f}",
+            )
+        )
+
+    @staticmethod
+    def log_slow(request, metrics):
+        logger.warning(
+            "Медленный запрос %s %s: %.1f мс, запросов к БД %d "
+            "(%.1f мс), сериализация %.1f мс, %d байт",
+            request.method,
+            request.get_full_path(),
+            metrics.duration * 1000,
+            metrics.queries,
+            metrics.db_time * 1000,
+            metrics.serialize_time * 1000,
+            metrics.size,
+        )
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        finally:
+            request = (renderer_context or {}).get("request")
+            metrics = getattr(request, "metrics", None)
+            if metrics is not None:
+                metrics.serialize_time += time.perf_counter() - started
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    if request.META.get("HTTP_AUTHORIZATION") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
@@ -13,6 +13,7 @@ ALLOWED_HOSTS = ["*"]
 INSTALLED_APPS = [
     "api.apps.ApiConfig",
     "users.apps.UsersConfig",
+    "benchmarks.apps.BenchmarksConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "foodgram.metrics.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -71,6 +73,21 @@ DATABASES = {
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", default=""),
+    }
+}
+
+CATALOGUE_CACHE_TIMEOUT = int(
+    os.getenv("CATALOGUE_CACHE_TIMEOUT", default=60 * 60)
+)
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -106,8 +123,12 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "mediafiles/")
 AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "foodgram.metrics.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -117,6 +138,43 @@ REST_FRAMEWORK = {
     ],
 }
 
+SHOPPING_CART_FONT = os.getenv(
+    "SHOPPING_CART_FONT",
+    default="/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", default=2))
+
+INGREDIENT_INDEX_TTL = int(os.getenv("INGREDIENT_INDEX_TTL", default=300))
+RECIPE_INGREDIENT_INDEX_TTL = int(
+    os.getenv("RECIPE_INGREDIENT_INDEX_TTL", default=60 * 60)
+)
+SIMILAR_RECIPES_CANDIDATES = int(
+    os.getenv("SIMILAR_RECIPES_CANDIDATES", default=500)
+)
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", default="")
+METRICS_SERVER_TIMING = (
+    os.getenv("METRICS_SERVER_TIMING", default="False") == "True"
+)
+METRICS_SLOW_REQUEST_MS = int(os.getenv("METRICS_SLOW_REQUEST_MS", default=500))
+METRICS_SLOW_QUERY_COUNT = int(
+    os.getenv("METRICS_SLOW_QUERY_COUNT", default=30)
+)
+
+ASGI_READ_THREADS = int(os.getenv("ASGI_READ_THREADS", default=16))
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", default=4))
+
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", default=60))
+
+RANKING_POPULAR_HALF_LIFE_DAYS = float(
+    os.getenv("RANKING_POPULAR_HALF_LIFE_DAYS", default=30)
+)
+RANKING_TRENDING_HALF_LIFE_DAYS = float(
+    os.getenv("RANKING_TRENDING_HALF_LIFE_DAYS", default=2)
+)
+RANKING_CART_WEIGHT = float(os.getenv("RANKING_CART_WEIGHT", default=2))
+
 DJOSER = {
     "PERMISSIONS": {
         "user_list": ["rest_framework.permissions.IsAuthenticatedOrReadOnly"],
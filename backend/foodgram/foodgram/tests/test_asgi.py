@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+from django.test import TestCase
+
+from foodgram.asgi import application
+
+
+class PooledAsgiTest(TestCase):
+    """ASGI-приложение отдаёт ответы из своих пулов потоков."""
+
+    def request(self, method, path):
+        messages = []
+        threads = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        def wsgi(environ, start_response):
+            threads.append(threading.current_thread().name)
+            return inner(environ, start_response)
+
+        inner = application.wsgi_application
+        application.wsgi_application = wsgi
+        self.addCleanup(setattr, application, "wsgi_application", inner)
+        asyncio.run(
+            application(
+                {
+                    "type": "http",
+                    "method": method,
+                    "path": path,
+                    "query_string": b"",
+                    "http_version": "1.1",
+                    "headers": [],
+                },
+                receive,
+                send,
+            )
+        )
+        return messages, threads[0]
+
+    def test_read_pool(self):
+        messages, thread = self.request("GET", "/api/tags/")
+        self.assertTrue(thread.startswith("asgi-read"))
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertFalse(messages[-1].get("more_body", False))
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        self.assertEqual(body, b"[]")
+
+    def test_write_pool(self):
+        messages, thread = self.request("POST", "/api/recipes/")
+        self.assertTrue(thread.startswith("asgi_"))
+        self.assertEqual(messages[0]["status"], 400)
@@ -8,5 +8,13 @@ class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ("user", "author")
 
 
-admin.site.register(User, UserAdmin)
+class CustomUserAdmin(UserAdmin):
+    list_display = UserAdmin.list_display + (
+        "recipes_count",
+        "followers_count",
+    )
+    readonly_fields = ("recipes_count", "followers_count")
+
+
+admin.site.register(User, CustomUserAdmin)
 admin.site.register(Subscription, SubscriptionAdmin)
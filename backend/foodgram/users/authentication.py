@@ -0,0 +1,54 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram.caches import cache_is_shared
+
+# Счётчики меняются через update() без сигналов: в снимке они устаревают, и
+# save() пользователя (PATCH /users/me/, set_password) вернул бы старые.
+DEFERRED_USER_FIELDS = ("user__recipes_count", "user__followers_count")
+
+
+def shared_key(key):
+    return f"auth:token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def invalidate_token(key):
+    cache.delete(shared_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Хранит (пользователь, токен) в общем кэше до AUTH_TOKEN_CACHE_TTL.
+
+    Снимок удаляют сигналы выхода и изменения пользователя; на кэше одного
+    процесса см. foodgram.caches.
+    """
+
+    def fetch_credentials(self, key):
+        model = self.get_model()
+        try:
+            token = (
+                model.objects.select_related("user")
+                .defer(*DEFERRED_USER_FIELDS)
+                .get(key=key)
+            )
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        return token.user, token
+
+    def authenticate_credentials(self, key):
+        if not cache_is_shared():
+            return self.fetch_credentials(key)
+        entry = cache.get(shared_key(key))
+        if entry is None:
+            entry = self.fetch_credentials(key)
+            cache.set(shared_key(key), entry, settings.AUTH_TOKEN_CACHE_TTL)
+        return entry
@@ -7,6 +7,12 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=154)
     username = models.CharField(unique=True, max_length=154)
     email = models.EmailField(unique=True)
+    recipes_count = models.PositiveIntegerField(
+        default=0, verbose_name="Рецептов"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name="Подписчиков"
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name", "username"]
@@ -24,12 +30,14 @@ class Subscription(models.Model):
         on_delete=models.CASCADE,
         related_name="follower",
         verbose_name="подписчик",
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name="following",
         verbose_name="автор",
+        db_index=False,
     )
 
     class Meta:
@@ -39,6 +47,11 @@ class Subscription(models.Model):
                 fields=["user", "author"], name="subscription"
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="subscription_author_user_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} -> {self.author}"
@@ -1,11 +1,15 @@
+from functools import partial
+
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 
 from .models import Subscription, User
+from api.fields import RecipeImageField
 from api.models import Recipe
+from api.sparse import SparseFieldsMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -20,6 +24,8 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, following):
+        if hasattr(following, "is_subscribed"):
+            return following.is_subscribed
         if self.context.get(
             "request",
         ).user.is_anonymous:
@@ -30,15 +36,23 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class SubscriptionRecipeSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(variant="thumbnail")
+
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
 
 
-class ListSubscriptionSerializer(serializers.ModelSerializer):
+class ListSubscriptionSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField(read_only=True)
+    collapsed_fields = {
+        "recipes": partial(
+            serializers.SerializerMethodField, method_name="get_recipe_ids"
+        ),
+    }
 
     class Meta:
         model = User
@@ -53,31 +67,41 @@ class ListSubscriptionSerializer(serializers.ModelSerializer):
             "recipes_count",
         )
 
-    def get_recipes_count(self, following):
-        return Recipe.objects.filter(author=following).count()
+    def following_recipes(self, following):
+        if hasattr(following, "limited_recipes"):
+            return following.limited_recipes
+        recipes_limit = self.context.get("request").query_params.get(
+            "recipes_limit"
+        )
+        if not recipes_limit:
+            return following.recipes.all()
+        return following.recipes.all()[: int(recipes_limit)]
 
     def get_recipes(self, following):
-        queryset = self.context.get("request")
-        recipes_limit = queryset.query_params.get("recipes_limit")
-        if not recipes_limit:
-            return RecipeFollowingSerializer(
-                following.recipes.all(),
-                many=True,
-                context={"request": queryset},
-            ).data
-        return RecipeFollowingSerializer(
-            following.recipes.all()[: int(recipes_limit)],
+        serializer = RecipeFollowingSerializer(
+            self.following_recipes(following),
             many=True,
-            context={"request": queryset},
-        ).data
+            context={"request": self.context.get("request")},
+        )
+        serializer.child.field_spec = self.get_field_spec().nested("recipes")
+        return serializer.data
+
+    def get_recipe_ids(self, following):
+        return [recipe.pk for recipe in self.following_recipes(following)]
 
     def get_is_subscribed(self, following):
+        if hasattr(following, "is_subscribed"):
+            return following.is_subscribed
         return Subscription.objects.filter(
             user=self.context.get("request").user, author=following
         ).exists()
 
 
-class RecipeFollowingSerializer(serializers.ModelSerializer):
+class RecipeFollowingSerializer(
+    SparseFieldsMixin, serializers.ModelSerializer
+):
+    image = RecipeImageField(variant="thumbnail")
+
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
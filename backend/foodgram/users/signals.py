@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_tokens(instance, **kwargs):
+    for key in Token.objects.filter(user_id=instance.pk).values_list(
+        "key", flat=True
+    ):
+        invalidate_token(key)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from api.tests.fixtures import create_user, shared_cache, token_client
+from users.authentication import shared_key
+from users.models import User
+
+
+@shared_cache
+class CachedTokenAuthenticationTest(TestCase):
+    """Отзыв токена сразу виден всем процессам через общий кэш."""
+
+    def setUp(self):
+        self.user = create_user("user")
+        self.client = token_client(self.user)
+        self.token = Token.objects.get(user=self.user)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_logout_revokes_cached_token(self):
+        self.assertEqual(self.client.get("/api/users/me/").status_code, 200)
+        self.assertIsNotNone(cache.get(shared_key(self.token.key)))
+        response = self.client.post("/api/auth/token/logout/")
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(cache.get(shared_key(self.token.key)))
+        self.assertEqual(self.client.get("/api/users/me/").status_code, 401)
+
+    def test_user_change_drops_snapshot(self):
+        self.client.get("/api/users/me/")
+        self.user.first_name = "Имя"
+        self.user.save()
+        response = self.client.get("/api/users/me/")
+        self.assertEqual(response.data["first_name"], "Имя")
+
+    def test_profile_update_keeps_counters(self):
+        self.client.get("/api/users/me/")
+        follower = token_client(create_user("follower"))
+        response = follower.post(f"/api/users/{self.user.pk}/subscribe/")
+        self.assertEqual(response.status_code, 201)
+        response = self.client.patch(
+            "/api/users/me/", {"first_name": "Имя"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.first_name, "Имя")
+        self.assertEqual(user.followers_count, 1)
@@ -0,0 +1,69 @@
+from django.test import TestCase
+
+from api.models import Recipe
+from api.tests.fixtures import create_recipe, create_user, token_client
+from users.models import Subscription, User
+
+
+class SubscriptionRecipesTest(TestCase):
+    """recipes_limit отдаёт по несколько новых рецептов каждого автора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("user")
+        cls.recipes = {}
+        for index in range(3):
+            author = create_user(f"author{index}")
+            Subscription.objects.create(user=cls.user, author=author)
+            cls.recipes[author.pk] = [
+                create_recipe(author, f"Рецепт {index}.{number}").pk
+                for number in range(index + 2)
+            ]
+            User.objects.filter(pk=author.pk).update(
+                recipes_count=index + 2
+            )
+
+    def setUp(self):
+        self.client = token_client(self.user)
+
+    def test_top_per_author(self):
+        rows = Recipe.objects.filter(
+            author__in=self.recipes.keys()
+        ).top_per_author(2)
+        expected = [
+            pk
+            for author_id in sorted(self.recipes)
+            for pk in sorted(self.recipes[author_id], reverse=True)[:2]
+        ]
+        self.assertEqual([recipe.pk for recipe in rows], expected)
+
+    def get_subscriptions(self, query=""):
+        response = self.client.get(f"/api/users/subscriptions/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return {
+            author["id"]: author for author in response.json()["results"]
+        }
+
+    def test_recipes_limit(self):
+        for limit in (1, 2):
+            with self.subTest(limit=limit):
+                authors = self.get_subscriptions(f"recipes_limit={limit}")
+                for author_id, pks in self.recipes.items():
+                    author = authors[author_id]
+                    self.assertEqual(
+                        [recipe["id"] for recipe in author["recipes"]],
+                        sorted(pks, reverse=True)[:limit],
+                    )
+                    self.assertEqual(author["recipes_count"], len(pks))
+
+    def test_without_limit(self):
+        authors = self.get_subscriptions()
+        for author_id, pks in self.recipes.items():
+            self.assertEqual(len(authors[author_id]["recipes"]), len(pks))
+
+    def test_queries_do_not_depend_on_authors(self):
+        self.get_subscriptions("recipes_limit=2")
+        with self.assertNumQueries(4):
+            self.get_subscriptions("recipes_limit=2&limit=1")
+        with self.assertNumQueries(4):
+            self.get_subscriptions("recipes_limit=2&limit=3")
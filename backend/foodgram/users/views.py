@@ -1,3 +1,6 @@
+from django.db import transaction
+from django.db.models import BooleanField, F, Value
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -6,9 +9,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from .models import Subscription, User
-from .paginator import VariablePageSizePaginator
 from .serializers import (ListSubscriptionSerializer, SubscriptionSerializer,
                           UserSerializer)
+from api.counters import change_counter, delete_rows
+from api.models import Recipe
+from api.paginator import VariablePageSizePaginator
+from api.sparse import FieldSpec
 
 
 class CustomUserViewSet(UserViewSet):
@@ -23,13 +29,30 @@ class CustomUserViewSet(UserViewSet):
         )
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def attach_recipes(request, authors):
+        recipes_limit = request.query_params.get("recipes_limit")
+        limited_recipes = {author.id: [] for author in authors}
+        for recipe in Recipe.objects.filter(
+            author__in=limited_recipes.keys()
+        ).top_per_author(int(recipes_limit) if recipes_limit else None):
+            limited_recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.limited_recipes = limited_recipes[author.id]
+
     @action(
         detail=False, methods=["GET"], permission_classes=(IsAuthenticated,)
     )
     def subscriptions(self, request, pk=None):
+        self.cursor_ordering = "-subscription_id"
         subscriptions_list = self.paginate_queryset(
-            User.objects.filter(following__user=request.user)
+            User.objects.filter(following__user=request.user).annotate(
+                subscription_id=F("following__id"),
+                is_subscribed=Value(True, output_field=BooleanField()),
+            )
         )
+        if FieldSpec.from_request(request).includes("recipes"):
+            self.attach_recipes(request, subscriptions_list)
         serializer = ListSubscriptionSerializer(
             subscriptions_list, many=True, context={"request": request}
         )
@@ -40,14 +63,17 @@ class CustomUserViewSet(UserViewSet):
         methods=["POST", "DELETE"],
         permission_classes=(IsAuthenticated,),
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         if request.method != "POST":
-            subscription = get_object_or_404(
-                Subscription,
-                author=get_object_or_404(User, id=id),
-                user=request.user,
+            author = get_object_or_404(User, id=id)
+            if not delete_rows(
+                Subscription.objects.filter(author=author, user=request.user)
+            ):
+                raise Http404
+            change_counter(
+                User.objects.filter(pk=author.pk), "followers_count", -1
             )
-            self.perform_destroy(subscription)
             return Response(status=status.HTTP_204_NO_CONTENT)
         serializer = SubscriptionSerializer(
             data={
@@ -57,5 +83,10 @@ class CustomUserViewSet(UserViewSet):
             context={"request": request},
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        subscription = serializer.save()
+        change_counter(
+            User.objects.filter(pk=subscription.author_id),
+            "followers_count",
+            1,
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)